@@ -0,0 +1,100 @@
+"""
+Compares the float32 and the dynamically quantized int8 FeverousGenerator
+on a fixed set of evidences, reporting throughput and output agreement.
+
+Usage (from the repository root):
+    python -m benchmarks.quantization_compare --model-path ../models/t5_4.bin
+"""
+import argparse
+import time
+
+from src.claim import FeverousGenerator
+
+# Fixed set of evidences encoded in 'compact' form
+EVIDENCES = [
+    'Washington && List of cities && City | 7.615 millions && List of cities && Inhabitants',
+    'Francesco Totti && A.S. Roma && Name | 250 && A.S. Roma && Goals',
+    'Antonio Cassano && A.S. Roma && Name | 39 && A.S. Roma && Goals',
+    '1998 && Ezio Pinza && Year | Don Giovanni && Ezio Pinza && Role',
+    'Paris && France && Capital | 67 million && France && Population',
+    'Daniel Henry Chamberlain && List of governors of South Carolina && Governor'
+    ' | December 1, 1874 && List of governors of South Carolina && Took office',
+    'Thunder of the Gods && Thunder of the Gods && Title | 2013 && Thunder of the Gods && Released',
+    'Mount Everest && List of highest mountains && Mountain'
+    ' | 8,848 m && List of highest mountains && Height',
+    'Lake Superior && Great Lakes && Lake | 82,100 km2 && Great Lakes && Area',
+    'The Beatles && Abbey Road && Artist | 1969 && Abbey Road && Released'
+    ' | Apple && Abbey Road && Label',
+    'Universal Storage Platform && Hitachi Data Systems && Product'
+    ' | Discontinued && Hitachi Data Systems && Status',
+    'Marie Curie && Nobel Prize in Physics && Laureate | 1903 && Nobel Prize in Physics && Year',
+    'Amazon && List of rivers by length && River | 6,400 km && List of rivers by length && Length',
+    'Tokyo && 2020 Summer Olympics && Host city | 206 && 2020 Summer Olympics && Nations',
+    'Rome && Italy && Capital | 2,872,800 && Italy && Population'
+    ' | Lazio && Italy && Region',
+    'Apollo 11 && Apollo program && Mission | July 16, 1969 && Apollo program && Launch date',
+]
+
+
+def token_f1(prediction, reference):
+    """
+    Token level F1 between two claims, used as a rough quality proxy.
+    """
+    pred = prediction.lower().split()
+    ref = reference.lower().split()
+    common = sum(min(pred.count(t), ref.count(t)) for t in set(pred))
+    if common == 0:
+        return 0.0
+    precision = common / len(pred)
+    recall = common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def run(generator, texts, batch_size, repeat):
+    """
+    :return: the generated claims and the throughput in claims/sec
+    """
+    generator.generate_texts(texts[:batch_size], batch_size)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        claims = generator.generate_texts(texts, batch_size)
+    elapsed = time.perf_counter() - start
+    return claims, len(texts) * repeat / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model-path', required=True,
+                        help='fine-tuned t5-small state dict')
+    parser.add_argument('--quantized-dir', default=None,
+                        help='where the int8 weights are cached')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    fp32 = FeverousGenerator('compact', args.model_path)
+    fp32_claims, fp32_speed = run(fp32, EVIDENCES, args.batch_size, args.repeat)
+    del fp32
+
+    int8 = FeverousGenerator('compact', args.model_path,
+                             quantize=True,
+                             quantized_dir=args.quantized_dir)
+    int8_claims, int8_speed = run(int8, EVIDENCES, args.batch_size, args.repeat)
+
+    exact = sum(a == b for a, b in zip(fp32_claims, int8_claims)) / len(EVIDENCES)
+    f1 = sum(token_f1(b, a) for a, b in zip(fp32_claims, int8_claims)) / len(EVIDENCES)
+
+    for text, a, b in zip(EVIDENCES, fp32_claims, int8_claims):
+        print(f'evidence: {text}')
+        print(f'  fp32: {a}')
+        print(f'  int8: {b}')
+    print()
+    print(f'fp32 throughput: {fp32_speed:.2f} claims/sec')
+    print(f'int8 throughput: {int8_speed:.2f} claims/sec ({int8_speed / fp32_speed:.2f}x)')
+    print(f'exact match with fp32: {exact:.2%}')
+    print(f'token F1 with fp32: {f1:.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+Benchmarks the FEVEROUS retrievers on a synthetic database (see
+benchmarks/synthetic_db.py) or on a given one, and the whole pipeline with
+a stub generator in place of the model.
+
+For each retriever the whole database is scanned (the requested number of
+evidences is unbounded) and the throughput is reported in pages/sec and
+evidences/sec. The 'entity' key strategy is run only if spaCy and its
+en_core_web_sm model are installed.
+
+Usage (from the repository root):
+    python -m benchmarks.retriever_benchmark --pages 2000
+    python -m benchmarks.retriever_benchmark --db ../data/feverous_wikiv1.db --limit 5000
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+from src.claim import JsonlClaimWriter
+from src.claim import TextualClaimGenerator
+from src.evidence.feverous_retriever.entropy import FeverousRetrieverEntropy
+from src.evidence.feverous_retriever.random import FeverousRetrieverRandom
+from src.logger import logger
+from src.pipeline import ClaimGeneratorPipeline
+
+from .synthetic_db import write_synthetic_db
+
+UNBOUNDED = 10 ** 9
+
+
+class StubClaimGenerator(TextualClaimGenerator):
+    """
+    Returns the encoded evidence as claim, optionally sleeping to simulate
+    the latency of a model, so that the pipeline can be timed without one.
+    """
+
+    def __init__(self, encoding='compact', batch_size=16, latency=0.0):
+        """
+        :param latency: seconds slept for every claim
+        """
+        super().__init__(encoding, batch_size=batch_size)
+        self.latency = latency
+
+    def _generate_claim(self, text):
+        return self._generate_claims([text])[0]
+
+    def _generate_claims(self, texts):
+        if self.latency > 0:
+            time.sleep(self.latency * len(texts))
+        return texts
+
+
+def has_ner_model():
+    try:
+        import spacy
+        spacy.load('en_core_web_sm')
+    except (ImportError, OSError):
+        return False
+    return True
+
+
+def make_retrievers(db_path, args):
+    """
+    :return: list of (name, retriever factory)
+    """
+    common = dict(p_dataset=db_path,
+                  num_positive=UNBOUNDED,
+                  num_negative=UNBOUNDED,
+                  table_type=args.table_type,
+                  wrong_cell=args.wrong_cell,
+                  evidence_per_table=args.evidence_per_table,
+                  column_per_table=args.column_per_table,
+                  seed=args.seed)
+    strategies = ['random', 'first', 'sensible']
+    if has_ner_model():
+        strategies.append('entity')
+    else:
+        print('spaCy en_core_web_sm not available, skipping the entity key strategy')
+
+    factories = [(f'random[{s}]', lambda s=s: FeverousRetrieverRandom(key_strategy=s, **common))
+                 for s in strategies]
+    factories.append(('entropy', lambda: FeverousRetrieverEntropy(**common)))
+    return factories
+
+
+def limit_pages(retriever, limit):
+    if limit is not None:
+        retriever.ids = sorted(retriever.ids)[:limit]
+    return retriever
+
+
+def bench_retriever(factory, limit, repeat):
+    """
+    :return: dictionary of the measures of the best run
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        retriever = limit_pages(factory(), limit)
+        opened = time.perf_counter()
+        evidences = retriever.retrieve
+        elapsed = time.perf_counter() - opened
+        result = {
+            'open_seconds': opened - start,
+            'seconds': elapsed,
+            'pages': len(retriever.ids),
+            'evidences': len(evidences),
+            'supports': sum(e.label == 'SUPPORTS' for e in evidences),
+            'refutes': sum(e.label == 'REFUTES' for e in evidences),
+            'entity': sum(e.type_table == 'entity' for e in evidences),
+            'relational': sum(e.type_table == 'relational' for e in evidences),
+            'pages_per_second': len(retriever.ids) / elapsed,
+            'evidences_per_second': len(evidences) / elapsed,
+        }
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return best
+
+
+def bench_pipeline(factory, limit, args, streaming):
+    """
+    Retriever -> stub generator -> JSONL writer.
+
+    :return: dictionary of the measures
+    """
+    retriever = limit_pages(factory(), limit)
+    generator = StubClaimGenerator(batch_size=args.batch_size, latency=args.stub_latency)
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = JsonlClaimWriter(os.path.join(tmp, 'claims.jsonl'))
+        pipeline = ClaimGeneratorPipeline([retriever, generator, writer])
+        start = time.perf_counter()
+        if streaming:
+            n_claims = sum(1 for _ in pipeline.stream())
+        else:
+            n_claims = len(pipeline.generate())
+        elapsed = time.perf_counter() - start
+        writer.close()
+    return {'mode': 'stream' if streaming else 'generate',
+            'seconds': elapsed,
+            'claims': n_claims,
+            'claims_per_second': n_claims / elapsed,
+            'elements': pipeline.stats.to_list()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=None,
+                        help='FEVEROUS database, a synthetic one is written if missing')
+    parser.add_argument('--pages', type=int, default=1000,
+                        help='pages of the synthetic database')
+    parser.add_argument('--limit', type=int, default=None,
+                        help='scan only the first LIMIT pages of the database')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='the best of REPEAT runs is reported')
+    parser.add_argument('--table-type', default='both')
+    parser.add_argument('--wrong-cell', type=int, default=1)
+    parser.add_argument('--evidence-per-table', type=int, default=1)
+    parser.add_argument('--column-per-table', type=int, default=2)
+    parser.add_argument('--batch-size', type=int, default=16,
+                        help='batch size of the stub generator')
+    parser.add_argument('--stub-latency', type=float, default=0.0,
+                        help='seconds the stub generator sleeps per claim')
+    parser.add_argument('--json', default=None, help='also write the results to this file')
+    parser.add_argument('--log', action='store_true',
+                        help='keep the retriever logs, they are silenced by default')
+    args = parser.parse_args()
+
+    if not args.log:
+        logger.setLevel(logging.CRITICAL)
+
+    tmp = None
+    db_path = args.db
+    if db_path is None:
+        tmp = tempfile.TemporaryDirectory()
+        db_path = write_synthetic_db(os.path.join(tmp.name, 'feverous.db'),
+                                     args.pages, args.seed)
+        print(f'synthetic database of {args.pages} pages: {db_path}')
+
+    results = {'retrievers': {}, 'pipeline': []}
+    factories = make_retrievers(db_path, args)
+    print(f'{"retriever":<18} {"pages/s":>9} {"evid./s":>9} {"evid.":>7} '
+          f'{"SUP":>6} {"REF":>6} {"entity":>7} {"relat.":>7} {"open s":>7}')
+    for name, factory in factories:
+        r = bench_retriever(factory, args.limit, args.repeat)
+        results['retrievers'][name] = r
+        print(f'{name:<18} {r["pages_per_second"]:>9.1f} {r["evidences_per_second"]:>9.1f} '
+              f'{r["evidences"]:>7} {r["supports"]:>6} {r["refutes"]:>6} '
+              f'{r["entity"]:>7} {r["relational"]:>7} {r["open_seconds"]:>7.2f}')
+
+    print()
+    print(f'pipeline random[random] -> stub generator '
+          f'({args.stub_latency * 1000:.1f} ms/claim) -> JSONL writer')
+    for streaming in [False, True]:
+        p = bench_pipeline(factories[0][1], args.limit, args, streaming)
+        results['pipeline'].append(p)
+        print(f'{p["mode"]:<9} {p["seconds"]:>7.2f}s {p["claims"]:>7} claims '
+              f'{p["claims_per_second"]:>9.1f} claims/s')
+
+    if args.json is not None:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+Writes a synthetic FEVEROUS-style SQLite database, readable by FeverousDB,
+so that the retrievers can be benchmarked without the real dataset.
+
+Every page is stored in the `wiki` table as (id, data) where data is the page
+JSON: an `order` list, `section_<i>` entries and `table_<i>` entries whose
+cells have ids `cell_<t>_<r>_<c>` or `header_cell_<t>_<r>_<c>`.
+The pages mix:
+    - entity tables (infobox): one header cell on the left of every row
+    - relational tables: header rows on top, sometimes repeated inside the
+      table to start a new subtable, or stacked on two levels
+    - empty cells, cells repeating a value of the same column and
+      duplicated rows, in the given proportions
+    - pages with fewer tables than asked, to exercise the rejections
+
+Usage (from the repository root):
+    python -m benchmarks.synthetic_db --out /tmp/feverous_synthetic.db --pages 2000
+"""
+import argparse
+import json
+import os
+import sqlite3
+from typing import Dict, List
+
+import numpy as np
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'te', 'su', 'no', 'vi', 'del', 'mar',
+             'ton', 'ber', 'an', 'gio', 'pe', 'lu', 'sca', 'ri', 'co', 'ven']
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+
+
+class SyntheticPageFactory:
+    """
+    Builds the JSON of synthetic Wikipedia pages with tables.
+    """
+
+    def __init__(self,
+                 rng: np.random.Generator,
+                 entity_ratio: float = 0.4,
+                 multi_header_ratio: float = 0.3,
+                 empty_ratio: float = 0.05,
+                 duplicate_ratio: float = 0.1,
+                 min_rows: int = 3,
+                 max_rows: int = 30,
+                 min_cols: int = 2,
+                 max_cols: int = 8,
+                 max_tables: int = 3):
+        """
+        :param rng: random generator
+        :param entity_ratio: share of entity (infobox) tables
+        :param multi_header_ratio: share of relational tables with several header rows
+        :param empty_ratio: share of empty data cells
+        :param duplicate_ratio: share of data cells repeating a value of their
+                                column, and of rows duplicating the previous one
+        :param min_rows: minimum number of data rows of a table
+        :param max_rows: maximum number of data rows of a table
+        :param min_cols: minimum number of columns of a table
+        :param max_cols: maximum number of columns of a table
+        :param max_tables: maximum number of tables in a page, pages have 0 to max_tables
+        """
+        self.rng = rng
+        self.entity_ratio = entity_ratio
+        self.multi_header_ratio = multi_header_ratio
+        self.empty_ratio = empty_ratio
+        self.duplicate_ratio = duplicate_ratio
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.min_cols = min_cols
+        self.max_cols = max_cols
+        self.max_tables = max_tables
+
+    def word(self) -> str:
+        n = self.rng.integers(2, 4)
+        return ''.join(self.rng.choice(SYLLABLES, n)).capitalize()
+
+    def name(self) -> str:
+        return f'{self.word()} {self.word()}'
+
+    def value(self, kind: str) -> str:
+        if kind == 'int':
+            return str(self.rng.integers(0, 10000))
+        if kind == 'float':
+            return f'{self.rng.random() * 1000:.2f}'
+        if kind == 'date':
+            return f'{MONTHS[self.rng.integers(12)]} {self.rng.integers(1, 29)}, ' \
+                   f'{self.rng.integers(1900, 2023)}'
+        if kind == 'link':
+            name = self.name()
+            return f'[[{name.replace(" ", "_")}|{name}]]'
+        return self.name()
+
+    @staticmethod
+    def cell(cell_id: str, value: str, is_header: bool) -> Dict:
+        return {'id': cell_id, 'value': value, 'is_header': is_header,
+                'row_span': 1, 'column_span': 1}
+
+    def data_values(self, kinds: List[str], previous: List[List[str]]) -> List[str]:
+        """
+        :param kinds: kind of value of each column
+        :param previous: values of the previous data rows
+        :return: the values of a new data row
+        """
+        if len(previous) > 0 and self.rng.random() < self.duplicate_ratio:
+            return list(previous[-1])  # duplicated row
+        values = []
+        for c, kind in enumerate(kinds):
+            r = self.rng.random()
+            if r < self.empty_ratio:
+                values.append('')
+            elif r < self.empty_ratio + self.duplicate_ratio and len(previous) > 0:
+                values.append(previous[self.rng.integers(len(previous))][c])
+            else:
+                values.append(self.value(kind))
+        return values
+
+    def relational_table(self,
+                         t: int,
+                         n_rows: int = None,
+                         n_cols: int = None,
+                         n_headers: int = None) -> Dict:
+        """
+        :param t: index of the table in the page
+        :param n_rows: number of data rows, random if None
+        :param n_cols: number of columns, random if None
+        :param n_headers: number of header rows, evenly spread so that each
+                          starts a subtable. If None the header layout is random
+        :return: the table JSON
+        """
+        if n_cols is None:
+            n_cols = int(self.rng.integers(self.min_cols, self.max_cols + 1))
+        if n_rows is None:
+            n_rows = int(self.rng.integers(self.min_rows, self.max_rows + 1))
+        kinds = ['name'] + list(self.rng.choice(['name', 'int', 'float', 'date', 'link'],
+                                                n_cols - 1))
+        multi_header = n_headers is None and self.rng.random() < self.multi_header_ratio
+        header_every = None if n_headers is None else -(-n_rows // n_headers)
+
+        rows = []
+
+        def header_row():
+            r = len(rows)
+            rows.append([self.cell(f'header_cell_{t}_{r}_{c}', self.word(), True)
+                         for c in range(n_cols)])
+
+        header_row()
+        if multi_header and self.rng.random() < 0.5:
+            header_row()  # two levels of headers
+        previous = []
+        for i in range(n_rows):
+            if (multi_header and i > 0 and self.rng.random() < 2 / n_rows) or \
+                    (header_every is not None and i > 0 and i % header_every == 0):
+                header_row()  # a new subtable starts
+                previous = []
+            values = self.data_values(kinds, previous)
+            previous.append(values)
+            r = len(rows)
+            rows.append([self.cell(f'cell_{t}_{r}_{c}', v, False)
+                         for c, v in enumerate(values)])
+        return {'type': 'table', 'table': rows}
+
+    def entity_table(self,
+                     t: int,
+                     n_rows: int = None,
+                     n_values: int = None) -> Dict:
+        """
+        :param t: index of the table in the page
+        :param n_rows: number of rows, i.e. of left header cells, random if None
+        :param n_values: number of value cells on the right of each header, random if None
+        :return: the table JSON
+        """
+        if n_values is None:
+            n_values = int(self.rng.integers(1, max(2, self.max_cols // 2)))
+        if n_rows is None:
+            n_rows = int(self.rng.integers(self.min_rows, self.max_rows + 1))
+        rows = []
+        previous = []
+        for r in range(n_rows):
+            values = self.data_values([str(k) for k in self.rng.choice(
+                ['name', 'int', 'date', 'link'], n_values)], previous)
+            previous.append(values)
+            rows.append([self.cell(f'header_cell_{t}_{r}_0', self.word(), True)] +
+                        [self.cell(f'cell_{t}_{r}_{c + 1}', v, False)
+                         for c, v in enumerate(values)])
+        return {'type': 'infobox', 'table': rows}
+
+    def page(self) -> Dict:
+        data = {'order': []}
+        n_tables = int(self.rng.integers(0, self.max_tables + 1))
+        for t in range(n_tables):
+            section = f'section_{t}'
+            data[section] = {'value': self.word(), 'level': 1}
+            data['order'].append(section)
+            if self.rng.random() < self.entity_ratio:
+                table = self.entity_table(t)
+            else:
+                table = self.relational_table(t)
+            data[f'table_{t}'] = table
+            data['order'].append(f'table_{t}')
+        return data
+
+
+def write_synthetic_db(path: str,
+                       n_pages: int,
+                       seed: int = 0,
+                       **factory_kwargs) -> str:
+    """
+    Writes a synthetic FEVEROUS database, replacing path if it exists.
+
+    :param path: SQLite file to write
+    :param n_pages: number of pages
+    :param seed: seed of the generated content
+    :param factory_kwargs: parameters of SyntheticPageFactory
+    :return: path
+    """
+    factory = SyntheticPageFactory(np.random.default_rng(seed), **factory_kwargs)
+    if os.path.exists(path):
+        os.remove(path)
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE wiki (id PRIMARY KEY, data)')
+    names = set()
+    rows = []
+    while len(rows) < n_pages:
+        name = factory.name()
+        if name in names:
+            continue
+        names.add(name)
+        rows.append((name, json.dumps(factory.page())))
+    connection.executemany('INSERT INTO wiki VALUES (?, ?)', rows)
+    connection.commit()
+    connection.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', required=True, help='SQLite file to write')
+    parser.add_argument('--pages', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--entity-ratio', type=float, default=0.4)
+    parser.add_argument('--multi-header-ratio', type=float, default=0.3)
+    parser.add_argument('--empty-ratio', type=float, default=0.05)
+    parser.add_argument('--duplicate-ratio', type=float, default=0.1)
+    parser.add_argument('--max-rows', type=int, default=30)
+    parser.add_argument('--max-cols', type=int, default=8)
+    parser.add_argument('--max-tables', type=int, default=3)
+    args = parser.parse_args()
+    print(write_synthetic_db(args.out, args.pages, args.seed,
+                             entity_ratio=args.entity_ratio,
+                             multi_header_ratio=args.multi_header_ratio,
+                             empty_ratio=args.empty_ratio,
+                             duplicate_ratio=args.duplicate_ratio,
+                             max_rows=args.max_rows,
+                             max_cols=args.max_cols,
+                             max_tables=args.max_tables))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""
+Scaling micro-benchmarks of the per-table heuristics of the retrievers.
+
+Synthetic tables (see benchmarks/synthetic_db.py) are generated while one
+dimension is swept and the others are kept fixed:
+    rows     number of data rows
+    cols     number of columns
+    headers  number of header rows, i.e. of subtables
+    empty    share of empty cells
+Each heuristic is timed on every table (median of --repeat runs). For the
+size sweeps the slope of log(time) against log(cells) is reported: about 1
+means linear scaling, about 2 quadratic.
+
+The entity key strategy (_key_entity) is timed only if spaCy and its
+en_core_web_sm model are installed.
+
+Usage (from the repository root):
+    python -m benchmarks.table_scaling
+    python -m benchmarks.table_scaling --sweep rows --max-rows 4096 --csv /tmp/rows.csv
+"""
+import argparse
+import csv
+import logging
+import time
+from copy import deepcopy
+
+import numpy as np
+from feverous.utils.wiki_table import WikiTable
+
+from src.evidence import EvidencePiece
+from src.evidence.feverous_retriever.entropy.feverous_retriever_entropy import \
+    entropy_entity_table
+from src.evidence.feverous_retriever.entropy.feverous_retriever_entropy import \
+    entropy_relational_table
+from src.evidence.feverous_retriever.random.random_entity_table import entity_table
+from src.evidence.feverous_retriever.random.random_relational_table import _key_entity
+from src.evidence.feverous_retriever.random.random_relational_table import _key_sensible
+from src.evidence.feverous_retriever.random.random_relational_table import relational_table
+from src.evidence.feverous_retriever.utils import TableException
+from src.evidence.feverous_retriever.utils import check_header_left
+from src.evidence.feverous_retriever.utils import create_negative_evidence
+from src.logger import logger
+
+from .retriever_benchmark import has_ner_model
+from .synthetic_db import SyntheticPageFactory
+
+PAGE = 'Synthetic page'
+EVIDENCE_PER_TABLE = 2
+COLUMN_PER_TABLE = 2
+
+
+def make_tables(rng, n_rows, n_cols, n_headers, empty_ratio):
+    """
+    :return: a relational and an entity WikiTable of the given size
+    """
+    factory = SyntheticPageFactory(rng, empty_ratio=empty_ratio, duplicate_ratio=0.05)
+    relational = WikiTable('table_0',
+                           factory.relational_table(0, n_rows, n_cols, n_headers),
+                           PAGE)
+    entity = WikiTable('table_1',
+                       factory.entity_table(1, n_rows, n_cols - 1),
+                       PAGE)
+    for tbl in [relational, entity]:
+        tbl.caption = [PAGE]
+    return relational, entity
+
+
+def evidence_pieces(tbl, rng):
+    """
+    Pieces extracted from the relational table like FeverousRetrieverRandom does,
+    used as input of create_negative_evidence.
+    """
+    cells, headers, possible = relational_table(tbl, len(tbl.get_rows()), rng,
+                                                EVIDENCE_PER_TABLE, COLUMN_PER_TABLE,
+                                                'random')
+    return [[EvidencePiece(PAGE, tbl.caption, cell, headers[i], possible[i])
+             for i, cell in enumerate(row)]
+            for row in cells]
+
+
+def heuristics(with_ner):
+    """
+    :return: list of (name, setup) where setup(relational, entity, rng)
+             returns the function to time and its arguments
+    """
+    def key_args(tbl):
+        # the whole first subtable, as in _get_cols_with_strategy
+        header_rows = [r.row_num for r in tbl.get_header_rows()] + [len(tbl.get_rows())]
+        return tbl, len(tbl.get_header_rows()[0].row), header_rows[0] + 1, header_rows[1]
+
+    cases = [
+        ('check_header_left',
+         lambda rel, ent, rng: (check_header_left, (ent,))),
+        ('relational_table',
+         lambda rel, ent, rng: (relational_table, (rel, len(rel.get_rows()), rng,
+                                                   EVIDENCE_PER_TABLE, COLUMN_PER_TABLE,
+                                                   'random'))),
+        ('entity_table',
+         lambda rel, ent, rng: (entity_table, (ent, check_header_left(ent)[0], rng,
+                                               COLUMN_PER_TABLE, EVIDENCE_PER_TABLE))),
+        ('_key_sensible',
+         lambda rel, ent, rng: (_key_sensible, key_args(rel))),
+        ('entropy_relational_table',
+         lambda rel, ent, rng: (entropy_relational_table, (rel, EVIDENCE_PER_TABLE,
+                                                           COLUMN_PER_TABLE))),
+        ('entropy_entity_table',
+         lambda rel, ent, rng: (entropy_entity_table, (ent, EVIDENCE_PER_TABLE,
+                                                       COLUMN_PER_TABLE))),
+        ('create_negative_evidence',
+         lambda rel, ent, rng: (create_negative_evidence,
+                                (deepcopy(evidence_pieces(rel, rng)), 1, rng, rel,
+                                 'relational'))),
+    ]
+    if with_ner:
+        cases.insert(4, ('_key_entity',
+                         lambda rel, ent, rng: (_key_entity, key_args(rel))))
+    return cases
+
+
+def time_case(setup, relational, entity, repeat, seed):
+    """
+    :return: median seconds of the call and number of runs raising TableException
+    """
+    times = []
+    failures = 0
+    for i in range(repeat):
+        rng = np.random.default_rng(seed + i)
+        try:
+            function, args = setup(relational, entity, rng)
+        except TableException:
+            # no valid input can be prepared from this table
+            return float('nan'), repeat
+        start = time.perf_counter()
+        try:
+            function(*args)
+        except TableException:
+            failures += 1
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)), failures
+
+
+def sweep_points(args):
+    """
+    :return: dictionary sweep name -> list of (value, n_rows, n_cols, n_headers, empty_ratio)
+    """
+    rows = [2 ** i for i in range(3, int(np.log2(args.max_rows)) + 1)]
+    cols = [2 ** i for i in range(2, int(np.log2(args.max_cols)) + 1)]
+    headers = [h for h in [1, 2, 4, 8, 16, 32, 64] if h <= args.base_rows // 2]
+    empty = [0.0, 0.1, 0.2, 0.3, 0.5, 0.7]
+    return {
+        'rows': [(r, r, args.base_cols, 1, args.empty_ratio) for r in rows],
+        'cols': [(c, args.base_rows, c, 1, args.empty_ratio) for c in cols],
+        'headers': [(h, args.base_rows, args.base_cols, h, args.empty_ratio) for h in headers],
+        'empty': [(e, args.base_rows, args.base_cols, 1, e) for e in empty],
+    }
+
+
+def loglog_slope(cells, seconds):
+    """
+    :return: slope of log(seconds) against log(cells), nan if not enough points
+    """
+    points = [(c, s) for c, s in zip(cells, seconds) if s > 0 and not np.isnan(s)]
+    if len(points) < 3:
+        return float('nan')
+    x, y = np.log([p[0] for p in points]), np.log([p[1] for p in points])
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sweep', nargs='+', default=['rows', 'cols', 'headers', 'empty'],
+                        choices=['rows', 'cols', 'headers', 'empty'])
+    parser.add_argument('--max-rows', type=int, default=2048)
+    parser.add_argument('--max-cols', type=int, default=128)
+    parser.add_argument('--base-rows', type=int, default=64,
+                        help='data rows when another dimension is swept')
+    parser.add_argument('--base-cols', type=int, default=6,
+                        help='columns when another dimension is swept')
+    parser.add_argument('--empty-ratio', type=float, default=0.05,
+                        help='share of empty cells when another dimension is swept')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--csv', default=None, help='also write every measure to this file')
+    args = parser.parse_args()
+
+    # TableException logs every rejection, it would dominate the timings
+    logger.setLevel(logging.CRITICAL)
+    with_ner = has_ner_model()
+    if not with_ner:
+        print('spaCy en_core_web_sm not available, skipping _key_entity')
+    cases = heuristics(with_ner)
+
+    records = []
+    points = sweep_points(args)
+    for sweep in args.sweep:
+        results = {name: [] for name, _ in cases}
+        cells = []
+        print(f'\n== sweep {sweep} ==')
+        print(f'{"heuristic":<26}' + ''.join(f'{p[0]:>10}' for p in points[sweep]) +
+              ('    slope' if sweep in ['rows', 'cols'] else ''))
+        for value, n_rows, n_cols, n_headers, empty_ratio in points[sweep]:
+            rng = np.random.default_rng(args.seed)
+            relational, entity = make_tables(rng, n_rows, n_cols, n_headers, empty_ratio)
+            cells.append(n_rows * n_cols)
+            for name, setup in cases:
+                seconds, failures = time_case(setup, relational, entity, args.repeat, args.seed)
+                results[name].append(seconds)
+                records.append({'sweep': sweep, 'value': value, 'heuristic': name,
+                                'rows': n_rows, 'cols': n_cols, 'headers': n_headers,
+                                'empty_ratio': empty_ratio, 'seconds': seconds,
+                                'failures': failures})
+
+        for name, _ in cases:
+            line = f'{name:<26}' + ''.join(f'{s * 1000:>8.3f}ms' for s in results[name])
+            if sweep in ['rows', 'cols']:
+                slope = loglog_slope(cells, results[name])
+                line += f'  {slope:>6.2f}' + ('  <- superlinear' if slope > 1.5 else '')
+            print(line)
+
+    if args.csv is not None:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(records[0].keys()))
+            writer.writeheader()
+            writer.writerows(records)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,15 @@
-import json
+from contextlib import ExitStack
+
 import hydra
 
-from src.claim import TextualClaim
-from src.claim import FeverousGenerator, ToTToGenerator
+from src.claim import JsonlClaimWriter, ColumnarClaimWriter
+from src.claim import FeverousGenerator, ToTToGenerator, OnnxT5Generator
+from src.claim import ParallelClaimGenerator, RemoteClaimGenerator
+from src.claim import ClaimCache, DecodingProfile
 
-from src.pipeline import ClaimGeneratorPipeline
+from src.logger import logger
+from src.pipeline import ClaimGeneratorPipeline, MicroBatchElement, StageMemo, StageProfiler
+from src.evidence import EvidenceDeduplicator
 from src.evidence.feverous_retriever.random import FeverousRetrieverRandom
 from src.evidence.feverous_retriever.entropy import FeverousRetrieverEntropy
 
@@ -24,17 +29,55 @@ def main(cfg):
                                           column_per_table=cfg.column_per_table,
                                           seed=cfg.seed,
                                           verbose=True,
-                                          key_strategy=strat
+                                          key_strategy=strat,
+                                          rejection_path=cfg.rejection_stats
                                           )
                   # for strat in ['entity', 'random']
                   for strat in ['random']
                   ]
 
-    generator1 = FeverousGenerator(encoding='compact',
-                                   model_path=cfg.main.model_path, )
+    cache = None
+    if cfg.claim_cache.path is not None:
+        cache = ClaimCache(cfg.claim_cache.path,
+                           max_entries=cfg.claim_cache.max_entries)
+
+    decoding_profile = DecodingProfile.from_dict(
+        cfg.decoding_profile, cfg.decoding_profiles[cfg.decoding_profile]
+    )
+
+    if cfg.generator_backend == 'onnx':
+        generator1 = OnnxT5Generator(encoding='compact',
+                                     onnx_dir=cfg.main.onnx_dir,
+                                     batch_size=cfg.batch_size,
+                                     cache=cache,
+                                     decoding_profile=decoding_profile)
+    elif cfg.generator_backend == 'remote':
+        generator1 = RemoteClaimGenerator(encoding='compact',
+                                          url=cfg.server_url,
+                                          cache=cache)
+    elif cfg.generator_workers > 1:
+        generator1 = ParallelClaimGenerator(FeverousGenerator,
+                                            {'encoding': 'compact',
+                                             'model_path': cfg.main.model_path,
+                                             'quantize': cfg.quantize,
+                                             'mmap_weights': cfg.mmap_weights},
+                                            n_workers=cfg.generator_workers,
+                                            threads_per_worker=cfg.threads_per_worker,
+                                            batch_size=cfg.batch_size,
+                                            cache=cache,
+                                            decoding_profile=decoding_profile)
+    else:
+        generator1 = FeverousGenerator(encoding='compact',
+                                       model_path=cfg.main.model_path,
+                                       batch_size=cfg.batch_size,
+                                       cache=cache,
+                                       quantize=cfg.quantize,
+                                       decoding_profile=decoding_profile,
+                                       mmap_weights=cfg.mmap_weights)
 
     # generator2 = ToTToGenerator(
-    # encoding='totto', model_path=cfg.main.model_path
+    # encoding='totto', model_path=cfg.main.model_path,
+    # batch_size=cfg.batch_size
     # )
     # generator3 = ToTToGenerator(encoding='compact',
     #                             model_path=cfg.main.model_path,
@@ -44,13 +87,74 @@ def main(cfg):
 
     generators = [generator1]
 
-    pipeline = ClaimGeneratorPipeline([retrievers, generators])
+    writers = [JsonlClaimWriter(cfg.output.path,
+                                compression=cfg.output.compression,
+                                flush_every=cfg.output.flush_every)]
+    if cfg.output.columnar_path is not None:
+        writers.append(ColumnarClaimWriter(cfg.output.columnar_path,
+                                           row_group_size=cfg.output.row_group_size))
+
+    elements = [retrievers]
+    executors = [cfg.retriever_executor]
+    if cfg.deduplicate:
+        deduplicator = EvidenceDeduplicator(encoding='compact',
+                                            verbose=cfg.verbose)
+        elements.append(deduplicator)
+        executors.append(None)
+    if cfg.streaming and cfg.micro_batch.size is not None:
+        # evidences of several pages are gathered into generator batches
+        elements.append(MicroBatchElement(max_batch_size=cfg.micro_batch.size,
+                                          max_wait=cfg.micro_batch.max_wait,
+                                          sort_by_length=cfg.micro_batch.sort_by_length,
+                                          encoding='compact'))
+        executors.append(None)
+    elements += [generators, *writers]
+    executors += [cfg.generator_executor] + [None] * len(writers)
+
+    profiler = None
+    if cfg.profiling.mode is not None:
+        profiler = StageProfiler(mode=cfg.profiling.mode,
+                                 interval=cfg.profiling.interval,
+                                 stages=cfg.profiling.stages)
+
+    pipeline = ClaimGeneratorPipeline(
+        elements,
+        executor=executors,
+        memo=StageMemo(cfg.stage_memo) if cfg.stage_memo is not None else None,
+        profiler=profiler
+    )
+    with ExitStack() as resources:
+        # closed in reverse order, each one even if a previous close failed
+        for writer in writers:
+            resources.callback(writer.close)
+        for generator in generators:
+            # worker processes of ParallelClaimGenerator, batching thread
+            # of CoalescingClaimGenerator
+            resources.callback(generator.close)
+        resources.callback(pipeline.close)
+        if profiler is not None:
+            profiler.start()
+            resources.callback(profiler.stop)
+
+        if cfg.streaming:
+            for _ in pipeline.stream(queue_size=cfg.stream_queue_size):
+                pass  # claims are written by the writers as they arrive
+        else:
+            pipeline.generate()
 
-    claims = pipeline.generate()
+    if profiler is not None:
+        paths = profiler.write(cfg.profiling.output_dir)
+        logger.info(f'Profile written to {", ".join(paths)}')
+        if cfg.verbose:
+            logger.info('\n' + profiler.format_summary(top=20))
 
-    json_evidence = TextualClaim.to_json(claims)
-    with open('data.json', 'w', encoding='utf-8') as f:
-        json.dump(json_evidence, f, ensure_ascii=False, indent=4)
+    if cfg.pipeline_stats.path is not None:
+        pipeline.stats.write(cfg.pipeline_stats.path, cfg.pipeline_stats.format)
+    if cfg.verbose:
+        logger.info(pipeline.stats)
+        for generator in generators:
+            for stats in generator.stats.values():
+                logger.info(stats)
 
 
 if __name__ == '__main__':
@@ -28,4 +28,10 @@ setuptools.setup(
     packages=setuptools.find_packages(where="src"),
     python_requires=">=3.6",
     install_requires=requirements,
+    # optional backends and output formats, imported only when used
+    extras_require={
+        "onnx": ["onnxruntime>=1.10"],
+        "zstd": ["zstandard>=0.17"],
+        "parquet": ["pyarrow>=7.0"],
+    },
 )
@@ -1,11 +1,31 @@
 from .claim import TextualClaim
 from .claim_generator import TextualClaimGenerator
+from .claim_writer import JsonlClaimWriter
+from .columnar_writer import ColumnarClaimWriter
+from .claim_cache import ClaimCache
+from .decoding import DecodingProfile
+from .decoding import GenerationStats
 from .feverous_generator import FeverousGenerator
 from .totto_generator import ToTToGenerator
+from .onnx_generator import OnnxT5Generator
+from .parallel_generator import ParallelClaimGenerator
+from .coalescing_generator import CoalescingClaimGenerator
+from .remote_generator import RemoteClaimGenerator
+from .server import ClaimGenerationServer
 
 __all__ = [
     "TextualClaim",
     "TextualClaimGenerator",
+    "JsonlClaimWriter",
+    "ColumnarClaimWriter",
+    "ClaimCache",
+    "DecodingProfile",
+    "GenerationStats",
     "FeverousGenerator",
-    "ToTToGenerator"
+    "ToTToGenerator",
+    "OnnxT5Generator",
+    "ParallelClaimGenerator",
+    "CoalescingClaimGenerator",
+    "RemoteClaimGenerator",
+    "ClaimGenerationServer",
 ]
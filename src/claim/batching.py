@@ -0,0 +1,102 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+
+class DynamicBatcher:
+    """
+    Merges the texts submitted by concurrent callers into shared batches.
+    A batch is sent to generate_fn as soon as it holds max_batch_size texts
+    or max_wait seconds have passed since its first request arrived.
+    """
+
+    def __init__(self,
+                 generate_fn: Callable[[List[str]], List[str]],
+                 max_batch_size: int = 32,
+                 max_wait: float = 0.01):
+        """
+        :param generate_fn: function generating the claims of a list of texts
+        :param max_batch_size: number of texts that triggers a batch
+        :param max_wait: seconds a request waits for others to join its batch
+        """
+        self.generate_fn = generate_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._requests = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()  # no request is queued after the stop marker
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """
+        :param texts: encoded evidences
+        :return: Future resolving to the list of claims of texts
+        :raise RuntimeError: if the batcher is closed
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Cannot submit texts to a closed DynamicBatcher')
+            if len(texts) == 0:
+                future.set_result([])
+            else:
+                self._requests.put((texts, future))
+        return future
+
+    def close(self):
+        """
+        Stops the batching thread once the pending requests are served.
+        Closing it again does nothing.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._requests.put(None)
+        self._thread.join()
+
+    def _loop(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            batch = [request]
+            n_texts = len(request[0])
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while n_texts < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+                n_texts += len(request[0])
+
+            self._run(batch)
+            if stop:
+                return
+
+    def _run(self, batch):
+        # requests cancelled while waiting are dropped
+        batch = [(texts, f) for texts, f in batch if f.set_running_or_notify_cancel()]
+        if len(batch) == 0:
+            return
+        try:
+            claims = self.generate_fn([t for texts, _ in batch for t in texts])
+        except Exception as e:
+            for _, f in batch:
+                f.set_exception(e)
+            return
+        start = 0
+        for texts, f in batch:
+            f.set_result(claims[start:start + len(texts)])
+            start += len(texts)
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+
+class ClaimCache:
+    """
+    Disk-backed cache of generated claims, stored in a SQLite file.
+    Entries are content-addressed: the key is a hash of the model identity,
+    the encoding, the decoding parameters and the encoded evidence text.
+    When the cache holds more than max_entries claims, the least recently
+    used ones are evicted.
+    """
+
+    def __init__(self,
+                 path: str,
+                 max_entries: int = 1000000):
+        """
+        :param path: path of the SQLite file, created if missing
+        :param max_entries: maximum number of claims kept in the cache
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS claims ("
+            " key TEXT PRIMARY KEY,"
+            " claim TEXT NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS claims_last_access ON claims (last_access)"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def make_key(model_id: str,
+                 encoding: str,
+                 decoding_params: Dict,
+                 text: str) -> str:
+        """
+        Computes the cache key of an encoded evidence.
+
+        :param model_id: fingerprint of the model weights
+        :param encoding: encoding used to produce text
+        :param decoding_params: parameters used by the model to decode
+        :param text: encoded evidence
+        :return: hex digest identifying the claim
+        """
+        payload = json.dumps([model_id, encoding, decoding_params, text],
+                             sort_keys=True,
+                             ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Looks up the claims of the given keys and marks them as recently used.
+
+        :param keys: list of cache keys
+        :return: dictionary key -> claim for the keys found in the cache
+        """
+        found = {}
+        with self._lock:
+            # SQLite limits the number of variables in a single query
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.connection.execute(
+                    f"SELECT key, claim FROM claims WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self.connection.executemany(
+                    "UPDATE claims SET last_access = ? WHERE key = ?",
+                    [(now, k) for k in found]
+                )
+                self.connection.commit()
+        return found
+
+    def put_many(self, items: List[Tuple[str, str]]):
+        """
+        Stores the given claims and evicts the least recently used entries
+        if the cache grows over max_entries.
+
+        :param items: list of (key, claim) pairs
+        """
+        if len(items) == 0:
+            return
+        now = time.time()
+        with self._lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO claims (key, claim, last_access) VALUES (?, ?, ?)",
+                [(k, c, now) for k, c in items]
+            )
+            n_entries = self.connection.execute("SELECT COUNT(*) FROM claims").fetchone()[0]
+            if n_entries > self.max_entries:
+                self.connection.execute(
+                    "DELETE FROM claims WHERE key IN ("
+                    " SELECT key FROM claims ORDER BY last_access LIMIT ?)",
+                    (n_entries - self.max_entries,)
+                )
+            self.connection.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM claims").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Computes a hash identifying the weights stored at path.
+    For a single file the whole content is hashed. For a directory
+    (e.g. a TensorFlow SavedModel) only the graph and the variables
+    index are hashed, since they change whenever the weights do.
+
+    :param path: path of a checkpoint file or of a model directory
+    :return: hex digest of the weights
+    """
+    if os.path.isdir(path):
+        files = [os.path.join(path, 'saved_model.pb'),
+                 os.path.join(path, 'variables', 'variables.index')]
+        files = [f for f in files if os.path.exists(f)]
+    else:
+        files = [path]
+
+    digest = hashlib.sha256()
+    for f in files:
+        with open(f, 'rb') as fh:
+            for block in iter(lambda: fh.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
@@ -1,7 +1,11 @@
+import time
 from abc import abstractmethod
+from ..evidence import encode_all
 from ..pipeline import PipelineElement
 from ..logger import logger
 from .claim import TextualClaim
+from .decoding import DecodingProfile
+from .decoding import GenerationStats
 
 
 class TextualClaimGenerator(PipelineElement):
@@ -9,29 +13,171 @@ class TextualClaimGenerator(PipelineElement):
     Element generating textual claims starting from Evidence objects.
     """
 
-    def __init__(self, encoding, verbose=False):
+    def __init__(self,
+                 encoding,
+                 verbose=False,
+                 batch_size=1,
+                 bucket_by_length=True,
+                 cache=None,
+                 decoding_profile=None):
+        """
+        :param encoding: encoding used to convert Evidence into text
+        :param verbose: if True prints additional debug messages
+        :param batch_size: how many evidences are sent to the model at once
+        :param bucket_by_length: if True, evidences of similar length are
+                                 batched together to reduce padding
+        :param cache: optional ClaimCache, claims found in it skip the model
+        :param decoding_profile: DecodingProfile used by the model,
+                                 None keeps the model defaults
+        """
         self.encoding = encoding
         self.verbose = verbose
+        self.batch_size = batch_size
+        self.bucket_by_length = bucket_by_length
+        self.cache = cache
+        self.decoding_profile = decoding_profile if decoding_profile is not None \
+            else DecodingProfile()
+        self.stats = {}  # GenerationStats for each decoding profile name
+        self._model_id = None
 
-    def generate(self, evidence):
+    def generate(self, evidence, batch_size=None):
         """
         Generate textual claims based on evidence
 
         :param evidence: a list of evidence objects
+        :param batch_size: overrides the batch size given at construction
         :return: a list of TextualClaim objects
         """
+        evidence_texts = encode_all(evidence, self.encoding)
+
+        claim_texts = self.generate_texts(evidence_texts, batch_size)
+
         claims = []
-        for i, e in enumerate(evidence):
-            evidence_text = e.to_text(self.encoding)
-            if self.verbose:
-                logger.info(evidence_text)
-            claim_text = self._generate_claim(evidence_text)
+        for e, evidence_text, claim_text in zip(evidence, evidence_texts, claim_texts):
             claim = TextualClaim(claim_text, e)
             claims.append(claim)
             if self.verbose:
+                logger.info(evidence_text)
                 logger.info(claim)
         return claims
 
+    def generate_texts(self, texts, batch_size=None):
+        """
+        Generates the claims of already encoded evidences, reading them from
+        the cache when possible. Only the missing ones are batched to the model.
+
+        :param texts: list of encoded evidences
+        :param batch_size: overrides the batch size given at construction
+        :return: list of claims in textual form, in the same order as texts
+        """
+        batch_size = self.batch_size if batch_size is None else batch_size
+        claim_texts = [None] * len(texts)
+        missing = list(range(len(texts)))
+        if self._cache_enabled():
+            keys = [self._cache_key(t) for t in texts]
+            found = self.cache.get_many(list(set(keys)))
+            missing = []
+            for i, k in enumerate(keys):
+                if k in found:
+                    claim_texts[i] = found[k]
+                else:
+                    missing.append(i)
+            if self.verbose:
+                logger.info(f'Claim cache hits {len(texts) - len(missing)}/{len(texts)}')
+
+        # the same text is sent to the model only once
+        unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+        generated = {}
+        for batch in self._batches(unique_texts, batch_size):
+            batch_texts = [unique_texts[i] for i in batch]
+            start = time.perf_counter()
+            generated.update(zip(batch_texts, self._generate_claims(batch_texts)))
+            self.profile_stats.add_batch(len(batch_texts), time.perf_counter() - start)
+        for i in missing:
+            claim_texts[i] = generated[texts[i]]
+
+        if self._cache_enabled():
+            self.cache.put_many([(self._cache_key(t), c) for t, c in generated.items()])
+        return claim_texts
+
+    def _cache_enabled(self):
+        """
+        Disables the cache, with a warning, if the model cannot be identified.
+
+        :return: True if claims are read from and written to the cache
+        """
+        if self.cache is not None and self._model_id is None:
+            self._model_id = self._model_fingerprint()
+            if self._model_id is None:
+                logger.warning(f'{type(self).__name__} does not identify its model, '
+                               f'the claim cache is disabled')
+                self.cache = None
+        return self.cache is not None
+
+    def _cache_key(self, text):
+        """
+        :param text: encoded evidence
+        :return: key of the claim generated from text in the cache
+        """
+        return self.cache.make_key(self._model_id,
+                                   self.encoding,
+                                   self._decoding_params(),
+                                   text)
+
+    def _model_fingerprint(self):
+        """
+        Identifies the model used for generation, claims generated by a
+        different model must not be shared through the cache.
+        Child classes should hash their weights, by default the model is
+        unknown and the cache is not used.
+
+        :return: a string identifying the model, or None
+        """
+        return None
+
+    def _decoding_params(self):
+        """
+        :return: dictionary of the parameters affecting the decoded claims
+        """
+        return self.decoding_profile.to_dict()
+
+    @property
+    def profile_stats(self):
+        """
+        :return: GenerationStats of the current decoding profile
+        """
+        name = self.decoding_profile.name
+        if name not in self.stats:
+            self.stats[name] = GenerationStats(name)
+        return self.stats[name]
+
+    def _batches(self, texts, batch_size):
+        """
+        Splits the texts in batches of at most batch_size elements.
+        If bucket_by_length is set, texts are first sorted by length so that
+        each batch contains texts of similar length.
+
+        :param texts: list of encoded evidences
+        :param batch_size: maximum number of texts in a batch
+        :return: a list of batches, each one a list of indices into texts
+        """
+        indices = list(range(len(texts)))
+        if self.bucket_by_length:
+            indices.sort(key=lambda i: len(texts[i]))
+        batch_size = max(1, batch_size)
+        return [indices[i:i + batch_size] for i in range(0, len(indices), batch_size)]
+
+    def _generate_claims(self, texts):
+        """
+        Given a batch of encoded Evidence generates the corresponding claims.
+        Child classes able to run batched inference should override it,
+        by default _generate_claim is called on each text.
+
+        :param texts: list of encoded pieces of Evidence
+        :return: list of claims in textual form, in the same order as texts
+        """
+        return [self._generate_claim(t) for t in texts]
+
     @abstractmethod
     def _generate_claim(self, text):
         """
@@ -44,6 +190,15 @@ class TextualClaimGenerator(PipelineElement):
         """
         raise NotImplementedError("Must have implemented this.")
 
+    def close(self):
+        """
+        Releases the workers or threads of the generator, if any.
+        """
+
+    @property
+    def stream_chunk_size(self):
+        # in streaming mode the model receives one full batch at a time
+        return self.batch_size
 
     def __call__(self, *args, **kwargs):
         return self.generate(args[0])
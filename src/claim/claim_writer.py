@@ -0,0 +1,89 @@
+import gzip
+import json
+from typing import List
+
+from ..pipeline import Batch
+from ..pipeline import PipelineElement
+from .claim import TextualClaim
+
+
+class JsonlClaimWriter(PipelineElement):
+    """
+    Writes TextualClaim objects to a JSON Lines file as soon as they are
+    received, one claim per line in the same format as TextualClaim.to_json.
+    Ids keep increasing across calls, so it can be the last element of a
+    pipeline called several times. Claims are returned unchanged.
+    """
+
+    def __init__(self,
+                 path: str,
+                 compression: str = None,
+                 flush_every: int = 100,
+                 start_id: int = 0):
+        """
+        :param path: output file
+        :param compression: None, 'gzip' or 'zstd' (needs the zstandard package)
+        :param flush_every: the file is flushed every flush_every claims
+        :param start_id: id of the first claim written
+        """
+        self.path = path
+        self.compression = compression
+        self.flush_every = flush_every
+        self.next_id = start_id
+        self._not_flushed = 0
+
+        if compression is None:
+            self.file = open(path, 'w', encoding='utf-8')
+        elif compression == 'gzip':
+            self.file = gzip.open(path, 'wt', encoding='utf-8')
+        elif compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError as e:
+                raise ImportError("zstd compression requires the zstandard package: "
+                                  "pip install zstandard, or pip install -e .[zstd]") from e
+            self.file = zstandard.open(path, 'wt', encoding='utf-8')
+        else:
+            raise ValueError(f"Expected compression in [None, 'gzip', 'zstd'] "
+                             f"but got {compression}")
+
+    def write(self, claims: List[TextualClaim]) -> List[TextualClaim]:
+        """
+        Appends the claims to the file.
+
+        :param claims: list of TextualClaim objects
+        :return: the same claims
+        """
+        if not isinstance(claims, list):
+            claims = [claims]
+        for c in claims:
+            line = json.dumps(TextualClaim._claim_to_json(self.next_id, c),
+                              ensure_ascii=False)
+            self.file.write(line + '\n')
+            self.next_id += 1
+            self._not_flushed += 1
+            if self._not_flushed >= self.flush_every:
+                self.flush()
+        return claims
+
+    def flush(self):
+        self.file.flush()
+        self._not_flushed = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __call__(self, *args, **kwargs):
+        return self.write(args[0])
+
+    def stream(self, items):
+        # items are written as soon as they arrive
+        for item in items:
+            yield from self.write(list(item) if isinstance(item, Batch) else [item])
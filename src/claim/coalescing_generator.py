@@ -0,0 +1,81 @@
+import asyncio
+
+from ..evidence import encode_all
+from .batching import DynamicBatcher
+from .claim import TextualClaim
+from .claim_generator import TextualClaimGenerator
+
+
+class CoalescingClaimGenerator(TextualClaimGenerator):
+    """
+    Shares one TextualClaimGenerator between concurrent callers, e.g. the
+    requests of an asyncio service running ClaimGeneratorPipeline.agenerate.
+    The texts of concurrent calls are merged into shared batches by a
+    DynamicBatcher, so the model runs one batch at a time instead of being
+    called by several threads with small inputs.
+    """
+
+    def __init__(self,
+                 generator: TextualClaimGenerator,
+                 max_batch_size: int = None,
+                 max_wait: float = 0.01,
+                 verbose=False):
+        """
+        :param generator: the shared generator, its cache and decoding profile
+                          are used for every request
+        :param max_batch_size: number of texts that triggers a batch,
+                               defaults to the batch size of generator
+        :param max_wait: seconds a request waits for others to join its batch
+        :param verbose: if True prints additional debug messages
+        """
+        max_batch_size = generator.batch_size if max_batch_size is None else max_batch_size
+        super().__init__(generator.encoding, verbose, generator.batch_size,
+                         decoding_profile=generator.decoding_profile)
+        self.generator = generator
+        self.stats = generator.stats  # batches are timed by the shared generator
+        self.batcher = DynamicBatcher(generator.generate_texts, max_batch_size, max_wait)
+
+    async def agenerate(self, evidence, timeout: float = None):
+        """
+        Generates the claims of evidence without blocking the event loop.
+        If the call is cancelled or times out before its batch starts,
+        its texts are not sent to the model.
+
+        :param evidence: a list of Evidence objects
+        :param timeout: seconds to wait for the claims, None waits forever
+        :return: a list of TextualClaim objects
+        """
+        evidence_texts = encode_all(evidence, self.encoding)
+        future = asyncio.wrap_future(self.batcher.submit(evidence_texts))
+        claim_texts = await asyncio.wait_for(future, timeout)
+        return [TextualClaim(c, e) for e, c in zip(evidence, claim_texts)]
+
+    async def acall(self, input, executor=None):
+        # the model runs in the batching thread, executor is not needed
+        return await self.agenerate(input)
+
+    def _model_fingerprint(self):
+        return self.generator._model_fingerprint()
+
+    def _decoding_params(self):
+        return self.generator._decoding_params()
+
+    def generate_texts(self, texts, batch_size=None):
+        # the whole request is submitted at once: caching, deduplication and
+        # batching are done by the shared generator on the merged texts
+        return self.batcher.submit(texts).result()
+
+    def _generate_claim(self, text):
+        return self.generate_texts([text])[0]
+
+    def close(self):
+        """
+        Stops the batching thread once the pending requests are served.
+        """
+        self.batcher.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,162 @@
+from typing import List, Union
+
+from ..evidence import Evidence
+from ..pipeline import Batch
+from ..pipeline import PipelineElement
+from .claim import TextualClaim
+
+
+def _schema(pa):
+    piece = pa.struct([
+        ('page', pa.string()),
+        ('cell_id', pa.string()),
+        ('table', pa.int32()),
+        ('row', pa.int32()),
+        ('column', pa.int32()),
+        ('content', pa.string()),
+        ('header', pa.string()),
+        ('swapped', pa.bool_()),
+        # position and content of the true cell, only for swapped pieces
+        ('true_cell_id', pa.string()),
+        ('true_row', pa.int32()),
+        ('true_column', pa.int32()),
+        ('true_content', pa.string()),
+    ])
+    return pa.schema([
+        ('id', pa.int64()),
+        ('label', pa.string()),
+        ('table_type', pa.string()),
+        ('claim', pa.string()),
+        ('pieces', pa.list_(piece)),
+    ])
+
+
+class ColumnarClaimWriter(PipelineElement):
+    """
+    Writes TextualClaim (or Evidence) objects to a Parquet or Arrow IPC file
+    with a typed schema, one row per claim with the list of its evidence
+    pieces. Rows are buffered and written in row groups of row_group_size,
+    so memory stays bounded. Items are returned unchanged.
+    """
+
+    def __init__(self,
+                 path: str,
+                 file_format: str = 'parquet',
+                 row_group_size: int = 10000,
+                 compression: str = 'zstd',
+                 start_id: int = 0):
+        """
+        :param path: output file
+        :param file_format: 'parquet' or 'arrow'
+        :param row_group_size: number of claims per row group / record batch
+        :param compression: parquet compression codec
+        :param start_id: id of the first claim written
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Columnar export requires the pyarrow package: "
+                              "pip install pyarrow, or pip install -e .[parquet]") from e
+        self.pa = pa
+        self.schema = _schema(pa)
+        self.path = path
+        self.row_group_size = row_group_size
+        self.next_id = start_id
+        self._rows = []
+
+        if file_format == 'parquet':
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(path, self.schema, compression=compression)
+        elif file_format == 'arrow':
+            self.writer = pa.ipc.new_file(path, self.schema)
+        else:
+            raise ValueError(f"Expected file_format in ['parquet', 'arrow'] "
+                             f"but got {file_format}")
+        self.file_format = file_format
+
+    def write(self,
+              items: List[Union[TextualClaim, Evidence]]
+              ) -> List[Union[TextualClaim, Evidence]]:
+        """
+        Buffers the items and writes every complete row group.
+
+        :param items: list of TextualClaim or Evidence objects
+        :return: the same items
+        """
+        if self.writer is None:
+            raise ValueError(f'Cannot write to {self.path}, the writer is closed')
+        if not isinstance(items, list):
+            items = [items]
+        for item in items:
+            self._rows.append(self._to_row(self.next_id, item))
+            self.next_id += 1
+            if len(self._rows) >= self.row_group_size:
+                self.flush()
+        return items
+
+    def flush(self):
+        """
+        Writes the buffered rows as one row group.
+        """
+        if len(self._rows) == 0:
+            return
+        table = self.pa.Table.from_pylist(self._rows, schema=self.schema)
+        self.writer.write_table(table)
+        self._rows = []
+
+    def close(self):
+        """
+        Writes the buffered rows and closes the file, closing it again does nothing.
+        """
+        if self.writer is None:
+            return
+        self.flush()
+        self.writer.close()
+        self.writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __call__(self, *args, **kwargs):
+        return self.write(args[0])
+
+    def stream(self, items):
+        # items are written as soon as they arrive
+        for item in items:
+            yield from self.write(list(item) if isinstance(item, Batch) else [item])
+
+    @staticmethod
+    def _to_row(sample_id: int,
+                item: Union[TextualClaim, Evidence]):
+        if isinstance(item, TextualClaim):
+            claim, evidence = str(item), item.evidence
+        else:
+            claim, evidence = None, item
+
+        pieces = []
+        for piece in evidence.evidence_pieces:
+            true_piece = piece.true_piece
+            pieces.append({
+                'page': piece.wiki_page,
+                'cell_id': piece.cell_id,
+                'table': piece.table,
+                'row': piece.row,
+                'column': piece.column,
+                'content': piece.content,
+                'header': piece.header_content,
+                'swapped': true_piece is not None,
+                'true_cell_id': None if true_piece is None else true_piece.cell_id,
+                'true_row': None if true_piece is None else true_piece.row,
+                'true_column': None if true_piece is None else true_piece.column,
+                'true_content': None if true_piece is None else true_piece.content,
+            })
+        return {
+            'id': sample_id,
+            'label': evidence.label,
+            'table_type': evidence.type_table,
+            'claim': claim,
+            'pieces': pieces,
+        }
@@ -0,0 +1,99 @@
+from typing import Dict, Optional
+
+
+class DecodingProfile:
+    """
+    Named set of decoding parameters used by the claim generators.
+    Parameters left to None keep the default of the underlying model.
+    """
+
+    def __init__(self,
+                 name: str = 'default',
+                 num_beams: int = 1,
+                 max_new_tokens: Optional[int] = None,
+                 max_input_tokens: Optional[int] = None,
+                 early_stopping: bool = False):
+        """
+        :param name: name of the profile, used to group generation statistics
+        :param num_beams: 1 for greedy decoding, more for beam search
+        :param max_new_tokens: hard limit on the generated tokens per claim
+        :param max_input_tokens: encoded evidences are truncated to this many tokens,
+                                 None keeps the limit of the model, if any
+        :param early_stopping: if True beam search stops as soon as
+                               num_beams finished candidates are found
+        """
+        if num_beams < 1:
+            raise ValueError(f"Expected num_beams >= 1 but got {num_beams}")
+        self.name = name
+        self.num_beams = num_beams
+        self.max_new_tokens = max_new_tokens
+        self.max_input_tokens = max_input_tokens
+        self.early_stopping = early_stopping
+
+    @classmethod
+    def from_dict(cls, name: str, params: Dict):
+        """
+        Builds a profile from its config entry, e.g. decoding_profiles.greedy
+
+        :param name: name of the profile
+        :param params: dictionary of decoding parameters
+        """
+        return cls(name, **dict(params))
+
+    def to_dict(self) -> Dict:
+        """
+        :return: the decoding parameters, the name is left out since it does
+                 not affect the generated claims
+        """
+        return {
+            'num_beams': self.num_beams,
+            'max_new_tokens': self.max_new_tokens,
+            'max_input_tokens': self.max_input_tokens,
+            'early_stopping': self.early_stopping,
+        }
+
+    def __str__(self):
+        params = ', '.join(f'{k}={v}' for k, v in self.to_dict().items())
+        return f'{self.name}({params})'
+
+
+class GenerationStats:
+    """
+    Statistics collected by a generator for one decoding profile.
+    """
+
+    def __init__(self, profile_name: str):
+        self.profile_name = profile_name
+        self.n_claims = 0
+        self.n_batches = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.seconds = 0.0
+
+    def add_batch(self, n_claims: int, seconds: float):
+        self.n_claims += n_claims
+        self.n_batches += 1
+        self.seconds += seconds
+
+    @property
+    def time_per_claim(self):
+        return self.seconds / self.n_claims if self.n_claims else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'profile': self.profile_name,
+            'claims': self.n_claims,
+            'batches': self.n_batches,
+            'tokens_in': self.tokens_in,
+            'tokens_out': self.tokens_out,
+            'seconds': self.seconds,
+            'time_per_claim': self.time_per_claim,
+        }
+
+    def __str__(self):
+        n = max(self.n_claims, 1)
+        return f'profile {self.profile_name}: {self.n_claims} claims' \
+               f' in {self.n_batches} batches,' \
+               f' {self.tokens_in / n:.1f} tokens in' \
+               f' / {self.tokens_out / n:.1f} tokens out per claim,' \
+               f' {self.time_per_claim * 1000:.1f} ms per claim'
@@ -1,6 +1,10 @@
-import transformers as ppb
-import torch
+import os
+from .claim_cache import file_fingerprint
 from .claim_generator import TextualClaimGenerator
+from .weights import assign_state_dict
+from .weights import convert_checkpoint
+from .weights import load_mmap_state_dict
+from .weights import mmap_path
 
 
 class FeverousGenerator(TextualClaimGenerator):
@@ -13,28 +17,136 @@ class FeverousGenerator(TextualClaimGenerator):
     def __init__(self,
                  encoding,
                  model_path,
-                 verbose=False):
-        super().__init__(encoding, verbose)
+                 verbose=False,
+                 batch_size=1,
+                 bucket_by_length=True,
+                 cache=None,
+                 quantize=False,
+                 quantized_dir=None,
+                 decoding_profile=None,
+                 mmap_weights=False):
+        """
+        :param encoding: encoding used to convert Evidence into text
+        :param model_path: path of the fine-tuned t5-small state dict
+        :param verbose: if True prints additional debug messages
+        :param batch_size: how many evidences are sent to the model at once
+        :param bucket_by_length: if True, evidences of similar length are
+                                 batched together to reduce padding
+        :param cache: optional ClaimCache, claims found in it skip the model
+        :param quantize: if True, the linear layers are dynamically quantized
+                         to int8 for faster CPU inference
+        :param quantized_dir: where the quantized weights are cached,
+                              defaults to the directory of model_path
+        :param decoding_profile: DecodingProfile used by model.generate,
+                                 None keeps the transformers defaults
+        :param mmap_weights: if True, the weights are memory-mapped from a
+                             converted copy of the checkpoint, shared by all
+                             the processes of the host
+        """
+        if quantize and mmap_weights:
+            raise ValueError("quantize and mmap_weights cannot be used together")
+        super().__init__(encoding, verbose, batch_size, bucket_by_length, cache,
+                         decoding_profile)
+        # torch and transformers are imported here to keep the package light
+        import torch
+        import transformers as ppb
+
+        self.model_path = model_path
+        self.quantize = quantize
         self.tokenizer = ppb.T5Tokenizer.from_pretrained("t5-small")
         config = ppb.AutoConfig.from_pretrained("t5-small")
         self.model = ppb.T5ForConditionalGeneration(config)
-        self.model.load_state_dict(torch.load(model_path,
-                                              map_location=torch.device('cpu')))
+        if quantize:
+            self._load_quantized(quantized_dir)
+        elif mmap_weights:
+            self._load_mmap()
+        else:
+            self.model.load_state_dict(torch.load(model_path,
+                                                  map_location=torch.device('cpu')))
+        self.model.eval()
+
+    def _load_quantized(self, quantized_dir=None):
+        """
+        Replaces the model with its dynamically quantized int8 version.
+        The quantized state dict is saved next to the checkpoint, named after
+        its hash, so later runs skip the float weights entirely.
+
+        :param quantized_dir: directory of the quantized weights cache
+        """
+        import torch
+
+        if quantized_dir is None:
+            quantized_dir = os.path.dirname(os.path.abspath(self.model_path))
+        self._model_id = self._model_fingerprint()
+        quantized_path = os.path.join(
+            quantized_dir,
+            f"{os.path.basename(self.model_path)}.{self._model_id.split(':')[1][:16]}.int8.pt"
+        )
+
+        if not os.path.exists(quantized_path):
+            self.model.load_state_dict(torch.load(self.model_path,
+                                                  map_location=torch.device('cpu')))
         self.model.eval()
+        self.model = torch.quantization.quantize_dynamic(self.model,
+                                                         {torch.nn.Linear},
+                                                         dtype=torch.qint8)
+        if os.path.exists(quantized_path):
+            self.model.load_state_dict(torch.load(quantized_path,
+                                                  map_location=torch.device('cpu')))
+        else:
+            os.makedirs(quantized_dir, exist_ok=True)
+            torch.save(self.model.state_dict(), quantized_path)
+
+    def _load_mmap(self):
+        """
+        Points the model weights to a memory-mapped copy of the checkpoint,
+        converting it first if missing or older than the checkpoint.
+        """
+        weights_path = mmap_path(self.model_path)
+        if not os.path.exists(weights_path) or \
+                os.path.getmtime(weights_path) < os.path.getmtime(self.model_path):
+            convert_checkpoint(self.model_path, weights_path)
+        assign_state_dict(self.model, load_mmap_state_dict(weights_path))
+
+    def _model_fingerprint(self):
+        fingerprint = f'{type(self).__name__}:{file_fingerprint(self.model_path)}'
+        if self.quantize:
+            fingerprint += ':int8'
+        return fingerprint
 
     def _generate_claim(self, text):
-        model_input = self.tokenizer.encode(text,
-                                          add_special_tokens=True,
-                                          truncation=True,
-                                          return_tensors='pt'
-                                          ).to(self.model.device)
-        model_output = self.model.generate(model_input)
-        text_output = self.tokenizer.decode(model_output[0])
-        return self._clean_text(text_output)
+        return self._generate_claims([text])[0]
+
+    def _generate_claims(self, texts):
+        import torch
+
+        profile = self.decoding_profile
+        model_input = self.tokenizer(texts,
+                                     add_special_tokens=True,
+                                     truncation=True,
+                                     max_length=profile.max_input_tokens,
+                                     padding=True,
+                                     return_tensors='pt'
+                                     ).to(self.model.device)
+        # the decoder start token counts in max_length
+        max_length = None if profile.max_new_tokens is None else profile.max_new_tokens + 1
+        with torch.no_grad():
+            model_output = self.model.generate(
+                input_ids=model_input['input_ids'],
+                attention_mask=model_input['attention_mask'],
+                num_beams=profile.num_beams,
+                max_length=max_length,
+                early_stopping=profile.early_stopping
+            )
+        stats = self.profile_stats
+        stats.tokens_in += int(model_input['attention_mask'].sum())
+        stats.tokens_out += int((model_output[:, 1:] != self.tokenizer.pad_token_id).sum())
+        text_outputs = self.tokenizer.batch_decode(model_output)
+        return [self._clean_text(t) for t in text_outputs]
 
     @staticmethod
     def _clean_text(text):
         text = text.replace('<pad>','')
         text = text.replace('</s>', '')
         text = text.strip()
-        return text
\ No newline at end of file
+        return text
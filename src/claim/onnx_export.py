@@ -0,0 +1,156 @@
+"""
+Exports the fine-tuned t5-small checkpoint used by FeverousGenerator into
+ONNX graphs that can be run by OnnxT5Generator.
+
+Three graphs are written in the output directory:
+    encoder.onnx            input_ids, attention_mask -> encoder_hidden_states
+    decoder_init.onnx       first decoding step, returns logits and the
+                            key/value cache of every layer
+    decoder_with_past.onnx  following steps, reuses the key/value cache
+The sentencepiece vocabulary is copied next to them.
+
+Usage (from the repository root):
+    python -m src.claim.onnx_export --model-path ../models/t5_4.bin --output-dir ../models/t5_4_onnx
+"""
+import argparse
+import os
+
+import torch
+import transformers as ppb
+
+OPSET_VERSION = 12
+
+
+class _Encoder(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.encoder = model.encoder
+
+    def forward(self, input_ids, attention_mask):
+        return self.encoder(input_ids=input_ids,
+                            attention_mask=attention_mask,
+                            return_dict=True).last_hidden_state
+
+
+class _Decoder(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.decoder = model.decoder
+        self.lm_head = model.lm_head
+        # T5 rescales the output before projecting it on the tied vocabulary
+        self.scale = model.model_dim ** -0.5
+
+    def forward(self, decoder_input_ids, encoder_attention_mask,
+                encoder_hidden_states, *past):
+        past_key_values = None
+        if len(past) > 0:
+            past_key_values = tuple(tuple(past[i:i + 4]) for i in range(0, len(past), 4))
+        output = self.decoder(input_ids=decoder_input_ids,
+                              encoder_hidden_states=encoder_hidden_states,
+                              encoder_attention_mask=encoder_attention_mask,
+                              past_key_values=past_key_values,
+                              use_cache=True,
+                              return_dict=True)
+        logits = self.lm_head(output.last_hidden_state * self.scale)
+        presents = [t for layer in output.past_key_values for t in layer]
+        return (logits, *presents)
+
+
+def cache_names(n_layers, prefix):
+    """
+    :param n_layers: number of decoder layers
+    :param prefix: 'past' for inputs, 'present' for outputs
+    :return: names of the key/value cache tensors, four per layer
+    """
+    return [f'{prefix}_{layer}_{kind}'
+            for layer in range(n_layers)
+            for kind in ['self_key', 'self_value', 'cross_key', 'cross_value']]
+
+
+def export_t5_onnx(model_path: str,
+                   output_dir: str,
+                   base_model: str = "t5-small"):
+    """
+    Exports a fine-tuned T5 state dict into ONNX encoder/decoder graphs.
+
+    :param model_path: path of the state dict, as loaded by FeverousGenerator
+    :param output_dir: directory where the graphs are written
+    :param base_model: name of the pretrained configuration of the checkpoint
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    tokenizer = ppb.T5Tokenizer.from_pretrained(base_model)
+    config = ppb.AutoConfig.from_pretrained(base_model)
+    model = ppb.T5ForConditionalGeneration(config)
+    model.load_state_dict(torch.load(model_path, map_location=torch.device('cpu')))
+    model.eval()
+    tokenizer.save_vocabulary(output_dir)
+
+    n_layers = config.num_decoder_layers if config.num_decoder_layers else config.num_layers
+    past_names = cache_names(n_layers, 'past')
+    present_names = cache_names(n_layers, 'present')
+    # key/value tensors are (batch, heads, length, head_dim), self-attention
+    # ones grow with the decoded sequence, cross-attention ones with the input
+    cache_axes = {}
+    for name in past_names + present_names:
+        cache_axes[name] = {0: 'batch', 2: 'decoded' if '_self_' in name else 'sequence'}
+
+    sample = tokenizer(['Washington && List of cities && City'], return_tensors='pt')
+    input_ids = sample['input_ids']
+    attention_mask = sample['attention_mask']
+    decoder_input_ids = torch.full((1, 1), config.decoder_start_token_id, dtype=torch.long)
+
+    with torch.no_grad():
+        encoder = _Encoder(model)
+        torch.onnx.export(encoder,
+                          (input_ids, attention_mask),
+                          os.path.join(output_dir, 'encoder.onnx'),
+                          input_names=['input_ids', 'attention_mask'],
+                          output_names=['encoder_hidden_states'],
+                          dynamic_axes={'input_ids': {0: 'batch', 1: 'sequence'},
+                                        'attention_mask': {0: 'batch', 1: 'sequence'},
+                                        'encoder_hidden_states': {0: 'batch', 1: 'sequence'}},
+                          opset_version=OPSET_VERSION)
+        encoder_hidden_states = encoder(input_ids, attention_mask)
+
+        decoder = _Decoder(model)
+        decoder_axes = {'decoder_input_ids': {0: 'batch', 1: 'decoded'},
+                        'encoder_attention_mask': {0: 'batch', 1: 'sequence'},
+                        'encoder_hidden_states': {0: 'batch', 1: 'sequence'},
+                        'logits': {0: 'batch', 1: 'decoded'}}
+        torch.onnx.export(decoder,
+                          (decoder_input_ids, attention_mask, encoder_hidden_states),
+                          os.path.join(output_dir, 'decoder_init.onnx'),
+                          input_names=['decoder_input_ids', 'encoder_attention_mask',
+                                       'encoder_hidden_states'],
+                          output_names=['logits'] + present_names,
+                          dynamic_axes={**decoder_axes,
+                                        **{n: cache_axes[n] for n in present_names}},
+                          opset_version=OPSET_VERSION)
+        past = decoder(decoder_input_ids, attention_mask, encoder_hidden_states)[1:]
+
+        torch.onnx.export(decoder,
+                          (decoder_input_ids, attention_mask, encoder_hidden_states, *past),
+                          os.path.join(output_dir, 'decoder_with_past.onnx'),
+                          input_names=['decoder_input_ids', 'encoder_attention_mask',
+                                       'encoder_hidden_states'] + past_names,
+                          output_names=['logits'] + present_names,
+                          dynamic_axes={**decoder_axes, **cache_axes},
+                          opset_version=OPSET_VERSION)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model-path', required=True,
+                        help='fine-tuned state dict')
+    parser.add_argument('--output-dir', required=True,
+                        help='directory where the ONNX graphs are written')
+    parser.add_argument('--base-model', default='t5-small',
+                        help='pretrained configuration of the checkpoint')
+    args = parser.parse_args()
+    export_t5_onnx(args.model_path, args.output_dir, args.base_model)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+import os
+
+import numpy as np
+
+from .claim_cache import file_fingerprint
+from .claim_generator import TextualClaimGenerator
+
+ONNX_GRAPHS = ['encoder.onnx', 'decoder_init.onnx', 'decoder_with_past.onnx']
+
+
+class OnnxT5Generator(TextualClaimGenerator):
+    """
+    Generates TextualClaim objects with the FEVEROUS fine-tuned t5-small model
+    exported by onnx_export, running it on ONNX Runtime on CPU.
+    Decoding is greedy and reuses the key/value cache between steps.
+    The model was fine-tuned on strings encoded in 'compact' form.
+    Different encodings may provide worse results.
+    """
+    pad_token_id = 0
+    eos_token_id = 1
+    decoder_start_token_id = 0
+    model_max_length = 512  # input limit T5Tokenizer applies to t5-small
+
+    def __init__(self,
+                 encoding,
+                 onnx_dir,
+                 verbose=False,
+                 batch_size=1,
+                 bucket_by_length=True,
+                 cache=None,
+                 num_threads=None,
+                 decoding_profile=None):
+        """
+        :param encoding: encoding used to convert Evidence into text
+        :param onnx_dir: directory written by onnx_export
+        :param verbose: if True prints additional debug messages
+        :param batch_size: how many evidences are sent to the model at once
+        :param bucket_by_length: if True, evidences of similar length are
+                                 batched together to reduce padding
+        :param cache: optional ClaimCache, claims found in it skip the model
+        :param num_threads: ONNX Runtime intra-op threads, None lets it decide
+        :param decoding_profile: greedy DecodingProfile, None generates at most
+                                 19 tokens like transformers does by default
+        """
+        super().__init__(encoding, verbose, batch_size, bucket_by_length, cache,
+                         decoding_profile)
+        if self.decoding_profile.num_beams != 1:
+            raise ValueError(f"OnnxT5Generator only supports greedy decoding, "
+                             f"received {self.decoding_profile}")
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("OnnxT5Generator requires the onnxruntime package: "
+                              "pip install onnxruntime, or pip install -e .[onnx]") from e
+        import sentencepiece as spm
+
+        self.onnx_dir = onnx_dir
+        max_new_tokens = self.decoding_profile.max_new_tokens
+        # length of the decoded sequence, start token included
+        self.max_length = 20 if max_new_tokens is None else max_new_tokens + 1
+
+        options = ort.SessionOptions()
+        if num_threads is not None:
+            options.intra_op_num_threads = num_threads
+        self.encoder, self.decoder_init, self.decoder_with_past = [
+            ort.InferenceSession(os.path.join(onnx_dir, g),
+                                 sess_options=options,
+                                 providers=['CPUExecutionProvider'])
+            for g in ONNX_GRAPHS
+        ]
+        self.past_names = [i.name for i in self.decoder_with_past.get_inputs()
+                           if i.name.startswith('past_')]
+
+        self.tokenizer = spm.SentencePieceProcessor()
+        self.tokenizer.Load(os.path.join(onnx_dir, 'spiece.model'))
+
+    def _model_fingerprint(self):
+        graphs = ','.join(file_fingerprint(os.path.join(self.onnx_dir, g))
+                          for g in ONNX_GRAPHS)
+        return f'{type(self).__name__}:{graphs}'
+
+    def _generate_claim(self, text):
+        return self._generate_claims([text])[0]
+
+    def _generate_claims(self, texts):
+        input_ids, attention_mask = self._tokenize(texts)
+        encoder_hidden_states = self.encoder.run(
+            None, {'input_ids': input_ids, 'attention_mask': attention_mask})[0]
+
+        batch = len(texts)
+        decoded = np.full((batch, 1), self.decoder_start_token_id, dtype=np.int64)
+        finished = np.zeros(batch, dtype=bool)
+        feed = {'decoder_input_ids': decoded,
+                'encoder_attention_mask': attention_mask,
+                'encoder_hidden_states': encoder_hidden_states}
+        outputs = self.decoder_init.run(None, feed)
+
+        while True:
+            next_tokens = outputs[0][:, -1, :].argmax(axis=-1)
+            # sequences already ended are only padded
+            next_tokens = np.where(finished, self.pad_token_id, next_tokens)
+            decoded = np.concatenate([decoded, next_tokens[:, None]], axis=1)
+            finished |= next_tokens == self.eos_token_id
+            if finished.all() or decoded.shape[1] >= self.max_length:
+                break
+
+            feed['decoder_input_ids'] = next_tokens[:, None].astype(np.int64)
+            feed.update(zip(self.past_names, outputs[1:]))
+            outputs = self.decoder_with_past.run(None, feed)
+
+        stats = self.profile_stats
+        stats.tokens_in += int(attention_mask.sum())
+        stats.tokens_out += int((decoded[:, 1:] != self.pad_token_id).sum())
+        return [self._decode(ids) for ids in decoded]
+
+    def _tokenize(self, texts):
+        """
+        Tokenizes the texts as T5Tokenizer does: the texts are truncated to
+        max_input_tokens, or model_max_length if the profile has no limit,
+        an end of sequence token is appended and the batch is right padded.
+
+        :param texts: list of encoded evidences
+        :return: input_ids and attention_mask arrays of shape (batch, length)
+        """
+        max_input_tokens = self.decoding_profile.max_input_tokens
+        if max_input_tokens is None:
+            max_input_tokens = self.model_max_length
+        ids = [self.tokenizer.EncodeAsIds(t)[:max_input_tokens - 1] + [self.eos_token_id]
+               for t in texts]
+        length = max(len(i) for i in ids)
+        input_ids = np.full((len(ids), length), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(ids), length), dtype=np.int64)
+        for row, i in enumerate(ids):
+            input_ids[row, :len(i)] = i
+            attention_mask[row, :len(i)] = 1
+        return input_ids, attention_mask
+
+    def _decode(self, ids):
+        # the sentinel tokens T5 adds after the sentencepiece vocabulary are dropped
+        ids = [int(i) for i in ids
+               if i not in (self.pad_token_id, self.eos_token_id)
+               and i < self.tokenizer.GetPieceSize()]
+        return self.tokenizer.DecodeIds(ids).strip()
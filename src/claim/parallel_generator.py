@@ -0,0 +1,122 @@
+import multiprocessing as mp
+import os
+
+from .claim_generator import TextualClaimGenerator
+
+# Generator built once by each worker process
+_WORKER_GENERATOR = None
+
+
+def _init_worker(generator_class, generator_kwargs, threads_per_worker):
+    """
+    Pins the number of threads of the worker and loads its model.
+    """
+    global _WORKER_GENERATOR
+    for var in ['OMP_NUM_THREADS', 'MKL_NUM_THREADS']:
+        os.environ[var] = str(threads_per_worker)
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+        torch.set_num_interop_threads(1)
+    except ImportError:
+        pass  # the generator may not use torch at all
+    _WORKER_GENERATOR = generator_class(**generator_kwargs)
+
+
+def _worker_generate(texts, batch_size):
+    stats = _WORKER_GENERATOR.profile_stats
+    tokens_in, tokens_out = stats.tokens_in, stats.tokens_out
+    claims = _WORKER_GENERATOR.generate_texts(texts, batch_size)
+    return claims, stats.tokens_in - tokens_in, stats.tokens_out - tokens_out
+
+
+def _worker_fingerprint():
+    return _WORKER_GENERATOR._model_fingerprint()
+
+
+class ParallelClaimGenerator(TextualClaimGenerator):
+    """
+    Shards the evidences across several worker processes, each one loading
+    its own copy of the wrapped generator with a fixed number of threads.
+    On many-core CPUs several small workers are faster than a single
+    generator using all the cores. Claims are returned in the original order.
+    """
+
+    def __init__(self,
+                 generator_class,
+                 generator_kwargs,
+                 n_workers=2,
+                 threads_per_worker=1,
+                 verbose=False,
+                 batch_size=1,
+                 bucket_by_length=True,
+                 cache=None,
+                 decoding_profile=None):
+        """
+        :param generator_class: TextualClaimGenerator subclass run by the workers
+        :param generator_kwargs: arguments used by each worker to build it,
+                                 must include the encoding
+        :param n_workers: number of worker processes
+        :param threads_per_worker: intra-op threads of each worker
+        :param verbose: if True prints additional debug messages
+        :param batch_size: how many evidences a worker sends to its model at once
+        :param bucket_by_length: if True, evidences of similar length are
+                                 sent to the same worker
+        :param cache: optional ClaimCache, checked before dispatching to workers
+        :param decoding_profile: DecodingProfile used by the workers
+        """
+        super().__init__(generator_kwargs['encoding'], verbose, batch_size,
+                         bucket_by_length, cache, decoding_profile)
+        if generator_kwargs.get('cache') is not None:
+            raise ValueError("The cache must be given to ParallelClaimGenerator, "
+                             "not to the generators of the workers")
+        self.n_workers = n_workers
+        self.generator_kwargs = dict(generator_kwargs)
+        self.generator_kwargs['decoding_profile'] = self.decoding_profile
+        # spawn avoids forking a process that already holds torch threads
+        self.pool = mp.get_context('spawn').Pool(
+            n_workers,
+            initializer=_init_worker,
+            initargs=(generator_class, self.generator_kwargs, threads_per_worker)
+        )
+
+    def generate_texts(self, texts, batch_size=None):
+        batch_size = self.batch_size if batch_size is None else batch_size
+        # each call to _generate_claims gives a full batch to every worker
+        return super().generate_texts(texts, batch_size * self.n_workers)
+
+    @property
+    def stream_chunk_size(self):
+        return self.batch_size * self.n_workers
+
+    def _generate_claims(self, texts):
+        shard_size = -(-len(texts) // self.n_workers)  # ceil division
+        shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+        results = self.pool.starmap(_worker_generate,
+                                    [(shard, self.batch_size) for shard in shards])
+        claims = []
+        stats = self.profile_stats
+        for shard_claims, tokens_in, tokens_out in results:
+            claims += shard_claims
+            stats.tokens_in += tokens_in
+            stats.tokens_out += tokens_out
+        return claims
+
+    def _generate_claim(self, text):
+        return self._generate_claims([text])[0]
+
+    def _model_fingerprint(self):
+        return self.pool.apply(_worker_fingerprint)
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,87 @@
+import json
+import urllib.error
+import urllib.request
+
+from .claim_generator import TextualClaimGenerator
+
+
+class RemoteClaimGenerator(TextualClaimGenerator):
+    """
+    Generates TextualClaim objects by sending the encoded evidences to a
+    ClaimGenerationServer, so the model is not loaded by every run.
+    The encoding must match the one the served model was fine-tuned on,
+    it is checked against the server before the first request.
+    """
+
+    def __init__(self,
+                 encoding,
+                 url='http://127.0.0.1:8765',
+                 model='feverous',
+                 verbose=False,
+                 batch_size=64,
+                 bucket_by_length=False,
+                 cache=None,
+                 timeout=600):
+        """
+        :param encoding: encoding used to convert Evidence into text
+        :param url: address of the ClaimGenerationServer
+        :param model: name of the served model
+        :param verbose: if True prints additional debug messages
+        :param batch_size: how many evidences are sent in one request,
+                           the server batches them again for the model
+        :param bucket_by_length: if True, evidences of similar length are
+                                 sent in the same request
+        :param cache: optional ClaimCache, claims found in it are not requested
+        :param timeout: seconds to wait for the server reply
+        """
+        super().__init__(encoding, verbose, batch_size, bucket_by_length, cache)
+        self.url = url.rstrip('/')
+        self.model = model
+        self.timeout = timeout
+        self._model_info = None
+
+    @property
+    def model_info(self):
+        """
+        :return: encoding, fingerprint and decoding parameters of the served model
+        :raise ValueError: if the model is not served or expects another encoding
+        """
+        if self._model_info is None:
+            models = self._request('/models')
+            if self.model not in models:
+                raise ValueError(f"Model {self.model} not served at {self.url}, "
+                                 f"available: {list(models)}")
+            if models[self.model]['encoding'] != self.encoding:
+                raise ValueError(f"Model {self.model} at {self.url} expects the "
+                                 f"{models[self.model]['encoding']} encoding "
+                                 f"but got {self.encoding}")
+            self._model_info = models[self.model]
+        return self._model_info
+
+    def _model_fingerprint(self):
+        return self.model_info['fingerprint']
+
+    def _decoding_params(self):
+        # the decoding is decided by the server
+        return self.model_info['decoding_params']
+
+    def _generate_claim(self, text):
+        return self._generate_claims([text])[0]
+
+    def _generate_claims(self, texts):
+        self.model_info  # validates the served model before the first request
+        return self._request('/generate', {'model': self.model, 'texts': texts})['claims']
+
+    def _request(self, path, body=None):
+        data = None
+        if body is not None:
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(self.url + path,
+                                         data=data,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            error = json.loads(e.read().decode('utf-8')).get('error')
+            raise RuntimeError(f'Claim generation server error {e.code}: {error}') from e
@@ -0,0 +1,161 @@
+"""
+Local claim generation server. It keeps the generator models loaded between
+runs and merges the requests of concurrent clients into shared batches.
+RemoteClaimGenerator is the matching client.
+
+Endpoints:
+    GET  /models    name, encoding, fingerprint and decoding parameters
+                    of every served model
+    POST /generate  {"model": name, "texts": [...]} -> {"claims": [...]}
+
+Usage (from the repository root):
+    python -m src.claim.server --model-path ../models/t5_4.bin --port 8765
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from socketserver import ThreadingMixIn
+from typing import Dict
+
+from ..logger import logger
+from .batching import DynamicBatcher
+from .claim_generator import TextualClaimGenerator
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class ClaimGenerationServer:
+    """
+    Serves one or more TextualClaimGenerator over localhost HTTP.
+    Each model has its own DynamicBatcher, so the texts of concurrent
+    requests are generated together.
+    """
+
+    def __init__(self,
+                 generators: Dict[str, TextualClaimGenerator],
+                 host: str = '127.0.0.1',
+                 port: int = 8765,
+                 max_batch_size: int = 32,
+                 max_wait: float = 0.01):
+        """
+        :param generators: dictionary model name -> generator
+        :param host: address to listen on, keep it local
+        :param port: port to listen on
+        :param max_batch_size: number of texts that triggers a batch
+        :param max_wait: seconds a request waits for others to join its batch
+        """
+        self.generators = generators
+        self.batchers = {
+            name: DynamicBatcher(g.generate_texts, max_batch_size, max_wait)
+            for name, g in generators.items()
+        }
+        self.models = {
+            name: {'encoding': g.encoding,
+                   'fingerprint': g._model_fingerprint(),
+                   'decoding_params': g._decoding_params()}
+            for name, g in generators.items()
+        }
+        self.httpd = _ThreadingHTTPServer((host, port), self._handler_class())
+
+    def serve_forever(self):
+        host, port = self.httpd.server_address[:2]
+        logger.info(f'Serving {list(self.generators)} on http://{host}:{port}')
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self.httpd.server_close()
+        for batcher in self.batchers.values():
+            batcher.close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/models':
+                    self._reply(200, server.models)
+                else:
+                    self._reply(404, {'error': f'unknown path {self.path}'})
+
+            def do_POST(self):
+                if self.path != '/generate':
+                    self._reply(404, {'error': f'unknown path {self.path}'})
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    request = json.loads(self.rfile.read(length).decode('utf-8'))
+                    batcher = server.batchers[request['model']]
+                    texts = request['texts']
+                except (ValueError, KeyError) as e:
+                    self._reply(400, {'error': f'invalid request: {e!r}'})
+                    return
+                try:
+                    claims = batcher.submit(texts).result()
+                except Exception as e:
+                    logger.error(f'Generation failed: {e!r}')
+                    self._reply(500, {'error': repr(e)})
+                    return
+                self._reply(200, {'claims': claims})
+
+            def _reply(self, status, body):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # requests are too many to be logged
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--name', default='feverous',
+                        help='name clients use to select the model')
+    parser.add_argument('--backend', default='torch', choices=['torch', 'onnx', 'totto'])
+    parser.add_argument('--model-path', required=True,
+                        help='state dict, ONNX directory or ToTTo SavedModel')
+    parser.add_argument('--encoding', default='compact', choices=['compact', 'totto'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--batch-size', type=int, default=32,
+                        help='maximum number of texts in a model call')
+    parser.add_argument('--max-wait', type=float, default=0.01,
+                        help='seconds a request waits for others to join its batch')
+    parser.add_argument('--quantize', action='store_true',
+                        help='int8 quantization of the torch model')
+    args = parser.parse_args()
+
+    if args.backend == 'onnx':
+        from .onnx_generator import OnnxT5Generator
+        generator = OnnxT5Generator(args.encoding, args.model_path,
+                                    batch_size=args.batch_size)
+    elif args.backend == 'totto':
+        from .totto_generator import ToTToGenerator
+        generator = ToTToGenerator(args.encoding, args.model_path,
+                                   batch_size=args.batch_size)
+    else:
+        from .feverous_generator import FeverousGenerator
+        generator = FeverousGenerator(args.encoding, args.model_path,
+                                      batch_size=args.batch_size,
+                                      quantize=args.quantize)
+
+    ClaimGenerationServer({args.name: generator},
+                          host=args.host,
+                          port=args.port,
+                          max_batch_size=args.batch_size,
+                          max_wait=args.max_wait).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
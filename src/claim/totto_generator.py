@@ -1,5 +1,5 @@
-import tensorflow as tf
-import tensorflow_text
+from ..logger import logger
+from .claim_cache import file_fingerprint
 from .claim_generator import TextualClaimGenerator
 
 
@@ -9,8 +9,22 @@ class ToTToGenerator(TextualClaimGenerator):
     The model was fine-tuned on strings encoded in 'totto' form.
     Different encodings may provide worse results.
     """
-    def __init__(self, encoding, model_path, verbose=False):
-        super().__init__(encoding, verbose)
+    def __init__(self,
+                 encoding,
+                 model_path,
+                 verbose=False,
+                 batch_size=1,
+                 bucket_by_length=True,
+                 cache=None,
+                 decoding_profile=None):
+        super().__init__(encoding, verbose, batch_size, bucket_by_length, cache,
+                         decoding_profile)
+        # TensorFlow is imported here to keep the package light,
+        # tensorflow_text registers the ops used by the SavedModel
+        import tensorflow as tf
+        import tensorflow_text
+
+        self.model_path = model_path
         self.model = tf.saved_model.load(model_path)
         self.model_func = self.model.signatures[
             tf.saved_model.DEFAULT_SERVING_SIGNATURE_DEF_KEY
@@ -20,5 +34,33 @@ class ToTToGenerator(TextualClaimGenerator):
                              f"received {encoding}")
         self.encoding = encoding
 
+        profile = self.decoding_profile
+        if profile.num_beams != 1 or profile.max_new_tokens is not None:
+            logger.warning(f'Decoding profile {profile} is not fully supported: the '
+                           f'ToTTo SavedModel fixes beam search and output length, '
+                           f'only max_input_tokens is applied')
+
+    def _model_fingerprint(self):
+        return f'{type(self).__name__}:{file_fingerprint(self.model_path)}'
+
     def _generate_claim(self, text):
-        return self.model_func(tf.constant([text]))['outputs'].numpy()[0].decode("utf-8")
+        return self._generate_claims([text])[0]
+
+    def _generate_claims(self, texts):
+        import tensorflow as tf
+
+        # The SavedModel tokenizes internally, so the input cap and the
+        # statistics are computed on whitespace separated tokens
+        max_tokens = self.decoding_profile.max_input_tokens
+        if max_tokens is not None:
+            # only the texts over the cap are rewritten, the others are kept as is
+            texts = [' '.join(t.split()[:max_tokens]) if len(t.split()) > max_tokens else t
+                     for t in texts]
+        # The serving signature takes a vector of strings
+        outputs = self.model_func(tf.constant(texts))['outputs'].numpy()
+        claims = [o.decode("utf-8") for o in outputs]
+
+        stats = self.profile_stats
+        stats.tokens_in += sum(len(t.split()) for t in texts)
+        stats.tokens_out += sum(len(c.split()) for c in claims)
+        return claims
@@ -0,0 +1,148 @@
+"""
+Memory-mappable weights for the torch generators.
+
+torch.load reads a checkpoint into the private memory of every process.
+convert_checkpoint writes the state dict once as raw tensors preceded by a
+JSON index, so load_mmap_state_dict can map the file and build tensors
+that point directly into it. Processes loading the same file share its
+physical pages through the page cache.
+
+File layout:
+    8 bytes      little-endian length of the JSON index
+    JSON index   {name: {"dtype": str, "shape": [int], "offset": int}}
+    data         tensors, each aligned to ALIGNMENT bytes
+
+Usage (from the repository root):
+    python -m src.claim.weights --model-path ../models/t5_4.bin
+"""
+import argparse
+import json
+import os
+import struct
+
+import numpy as np
+
+ALIGNMENT = 64
+
+
+def mmap_path(model_path: str) -> str:
+    """
+    :param model_path: path of a torch checkpoint
+    :return: path of its memory-mappable version
+    """
+    return f'{model_path}.mmap'
+
+
+def convert_checkpoint(model_path: str,
+                       out_path: str = None) -> str:
+    """
+    Converts a torch state dict into the memory-mappable format.
+    Tensors sharing their storage (e.g. tied embeddings) are written once.
+
+    :param model_path: path of the torch checkpoint
+    :param out_path: destination, defaults to mmap_path(model_path)
+    :return: the path of the converted file
+    """
+    import torch
+
+    out_path = mmap_path(model_path) if out_path is None else out_path
+    state_dict = torch.load(model_path, map_location=torch.device('cpu'))
+
+    index = {}
+    arrays = []
+    written = {}  # (data_ptr, dtype, shape) -> offset of tensors already written
+    offset = 0
+    for name, tensor in state_dict.items():
+        tensor = tensor.detach().contiguous()
+        dtype = str(tensor.dtype).replace('torch.', '')
+        key = (tensor.data_ptr(), dtype, tuple(tensor.shape))
+        if key not in written:
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            written[key] = offset
+            array = tensor.numpy()
+            arrays.append((offset, array))
+            offset += array.nbytes
+        index[name] = {'dtype': dtype,
+                       'shape': list(tensor.shape),
+                       'offset': written[key]}
+
+    header = json.dumps(index).encode('utf-8')
+    data_start = -(-(8 + len(header)) // ALIGNMENT) * ALIGNMENT
+    tmp_path = f'{out_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for array_offset, array in arrays:
+            f.seek(data_start + array_offset)
+            f.write(array.tobytes())
+    # the file appears only once complete, so concurrent workers never map half of it
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def load_mmap_state_dict(path: str):
+    """
+    Maps a converted checkpoint in memory. The tensors are not copied: they
+    are backed by a copy-on-write mapping of the file.
+
+    :param path: path written by convert_checkpoint
+    :return: dictionary name -> torch tensor
+    """
+    import torch
+
+    with open(path, 'rb') as f:
+        header_len = struct.unpack('<Q', f.read(8))[0]
+        index = json.loads(f.read(header_len).decode('utf-8'))
+    data_start = -(-(8 + header_len) // ALIGNMENT) * ALIGNMENT
+
+    buffer = np.memmap(path, dtype=np.uint8, mode='c')
+    state_dict = {}
+    for name, entry in index.items():
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        start = data_start + entry['offset']
+        array = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(entry['shape'])
+        state_dict[name] = torch.from_numpy(array)
+    return state_dict
+
+
+def assign_state_dict(model, state_dict):
+    """
+    Makes the model parameters and buffers point to the given tensors
+    instead of copying them like load_state_dict does.
+    The parameters are frozen, the model can only be used for inference.
+
+    :param model: torch module
+    :param state_dict: dictionary name -> tensor, e.g. from load_mmap_state_dict
+    """
+    import torch
+
+    expected = set(model.state_dict().keys())
+    missing = expected - set(state_dict)
+    unexpected = set(state_dict) - expected
+    if missing or unexpected:
+        raise KeyError(f"State dict does not match the model. Missing keys: "
+                       f"{sorted(missing)}, unexpected keys: {sorted(unexpected)}")
+
+    for name, tensor in state_dict.items():
+        module_name, _, attr = name.rpartition('.')
+        module = model.get_submodule(module_name) if module_name else model
+        if attr in module._parameters:
+            setattr(module, attr, torch.nn.Parameter(tensor, requires_grad=False))
+        else:
+            module._buffers[attr] = tensor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model-path', required=True,
+                        help='torch checkpoint to convert')
+    parser.add_argument('--out-path', default=None,
+                        help='destination, defaults to <model-path>.mmap')
+    args = parser.parse_args()
+    print(convert_checkpoint(args.model_path, args.out_path))
+
+
+if __name__ == '__main__':
+    main()
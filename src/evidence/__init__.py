@@ -1,10 +1,16 @@
 from .evidence import EvidencePiece
 from .evidence import Evidence
+from .evidence import encode_all
 from .evidence_retriever import EvidenceRetriever
+from .deduplication import EvidenceDeduplicator
+from .deduplication import canonical_key
 
 __all__ = [
     "EvidencePiece",
     "Evidence",
+    "encode_all",
     "EvidenceRetriever",
+    "EvidenceDeduplicator",
+    "canonical_key",
     "feverous_retriever",
 ]
@@ -0,0 +1,106 @@
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from ..logger import logger
+from ..pipeline import Batch
+from ..pipeline import PipelineElement
+from .evidence import Evidence
+
+
+def canonical_key(evidence: Evidence) -> Tuple:
+    """
+    Identifies the content of an Evidence independently of the order of its
+    pieces: its label and the sorted cells of its pieces, with the true cell
+    of the swapped ones. Two evidences with the same key give the same claim
+    up to the order of the pieces.
+
+    :param evidence: Evidence object
+    :return: hashable key
+    """
+    cells = sorted((p.wiki_page,
+                    p.cell_id,
+                    None if p.true_piece is None else p.true_piece.cell_id)
+                   for p in evidence.evidence_pieces)
+    return evidence.label, tuple(cells)
+
+
+class EvidenceDeduplicator(PipelineElement):
+    """
+    Removes duplicated Evidence objects before claim generation, e.g. those
+    produced by several retrievers scanning the same database or by
+    evidence_per_table > 1. Every evidence is checked in O(1) against the
+    keys of the evidences already seen, across calls, so the same evidence
+    is never sent twice to the generator. Only the keys are kept, not the
+    evidences. Use reset to forget them.
+    """
+
+    def __init__(self,
+                 encoding: str = None,
+                 verbose: bool = False):
+        """
+        :param encoding: if given, the tokens of the encoded duplicates are
+                         counted to report the generation work saved
+        :param verbose: if True logs the number of duplicates after each call
+        """
+        self.encoding = encoding
+        self.verbose = verbose
+        self._seen = set()  # canonical keys of the evidences kept
+        self.n_seen = 0
+        self.n_duplicates = 0
+        self.saved_tokens = 0
+
+    def _is_new(self, evidence: Evidence) -> bool:
+        self.n_seen += 1
+        key = canonical_key(evidence)
+        if key not in self._seen:
+            self._seen.add(key)
+            return True
+
+        self.n_duplicates += 1
+        if self.encoding is not None:
+            self.saved_tokens += len(evidence.to_text(self.encoding).split())
+        return False
+
+    def deduplicate(self, evidences: List[Evidence]) -> List[Evidence]:
+        """
+        :param evidences: list of Evidence objects
+        :return: the evidences not seen before, in their original order
+        """
+        unique = [e for e in evidences if self._is_new(e)]
+        if self.verbose:
+            logger.info(self.summary())
+        return unique
+
+    def stream(self, items: Optional[Iterable[Any]]) -> Iterator[Any]:
+        # evidences are checked one by one, without waiting for a chunk
+        for item in items:
+            if isinstance(item, Batch):
+                unique = Batch(e for e in item if self._is_new(e))
+                if len(unique) > 0:
+                    yield unique
+            elif self._is_new(item):
+                yield item
+        if self.verbose:
+            logger.info(self.summary())
+
+    def summary(self) -> str:
+        """
+        :return: the number of duplicates removed, i.e. the generator calls saved
+        """
+        share = self.n_duplicates / self.n_seen if self.n_seen else 0.0
+        text = f'Duplicated evidences removed {self.n_duplicates}/{self.n_seen}' \
+               f' ({share:.1%} of the generation work saved)'
+        if self.encoding is not None:
+            text += f', {self.saved_tokens} encoded input tokens saved'
+        return text
+
+    def reset(self):
+        """
+        Forgets the evidences seen so far and the counters of the summary.
+        """
+        self._seen = set()
+        self.n_seen = 0
+        self.n_duplicates = 0
+        self.saved_tokens = 0
+
+    def __call__(self, *args, **kwargs):
+        return self.deduplicate(args[0])
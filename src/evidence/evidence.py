@@ -89,6 +89,7 @@ class Evidence:
         self.evidence_pieces = evidence_pieces
         self.label = label
         self.type_table = type_table
+        self._encoded = {}  # encoded text for each encoding already computed
 
     def __str__(self):
         my_string = ''
@@ -103,16 +104,19 @@ class Evidence:
         Converts evidence objects into strings the model can elaborate
         to generate a textual claim.
         Uses selected encoding. Possible choices are 'compact' and 'totto'.
+        The text is computed once per encoding and then reused.
 
         :param encoding: encoding to use
         :return: text encoded in chosen form.
         """
-        if encoding == 'compact':
-            return self.to_compact_text()
-        elif encoding == 'totto':
-            return self.to_totto_text()
-        else:
-            raise ValueError('Invalid choice of encoding')
+        if encoding not in self._encoded:
+            if encoding == 'compact':
+                self._encoded[encoding] = self.to_compact_text()
+            elif encoding == 'totto':
+                self._encoded[encoding] = self.to_totto_text()
+            else:
+                raise ValueError('Invalid choice of encoding')
+        return self._encoded[encoding]
 
     # TODO: solve circular dependency
     def to_compact_text(self):
@@ -125,15 +129,17 @@ class Evidence:
                  'Washington && City && List of cities
                  | 7.615 millions && Inhabitants && List of cities '
         """
-        ep_to_text = lambda ep: ' && '.join([ep.content, ep.wiki_page, ep.header_content])
-        textual_pieces = [ep_to_text(ep) for ep in self.evidence_pieces]
-        return ' | '.join(textual_pieces)
+        return ' | '.join(
+            ' && '.join((ep.content, ep.wiki_page, ep.header_content))
+            for ep in self.evidence_pieces
+        )
 
     # TODO: solve circular dependency
     def to_totto_text(self):
         """
         Converts evidence objects into strings
-        the model can elaborate to generate a textual claim
+        the model can elaborate to generate a textual claim.
+        The evidence pieces are sorted in a copy, the Evidence is not modified.
 
         :return: text encoded in totto form.
                  eg: <page_title> list of governors of south carolina </page_title>
@@ -142,8 +148,7 @@ class Evidence:
                   <cell> daniel henry chamberlain </cell>
                   <cell> december 1, 1874 </cell> </table>
         """
-        pieces = self.evidence_pieces
-        pieces.sort()
+        pieces = sorted(self.evidence_pieces)
 
         t_start = '<table> '
         t_end = ' </table>'
@@ -157,25 +162,40 @@ class Evidence:
 
         # TODO: implement better management for title
         #  (eg: print every unique title across all EvidencePieces)
-        text = title + t_start + r_start + c_start
+        parts = [title, t_start, r_start, c_start]
         curr_table = pieces[0].table
         curr_row = pieces[0].row
         curr_column = pieces[0].column
 
         for p in pieces:
             if p.table != curr_table:
-                text += c_end + r_end + t_end + t_start + r_start + c_start
+                parts += [c_end, r_end, t_end, t_start, r_start, c_start]
                 curr_table = p.table
                 curr_row = p.row
                 curr_column = p.column
             elif p.row != curr_row:
-                text += c_end + r_end + r_start + c_start
+                parts += [c_end, r_end, r_start, c_start]
                 curr_row = p.row
                 curr_column = p.column
             elif p.column != curr_column:
-                text += c_end + c_start
+                parts += [c_end, c_start]
                 curr_column = p.column
-            text += p.content + h_start + p.header_content + h_end
+            parts += [p.content, h_start, p.header_content, h_end]
+
+        parts += [c_end, r_end, t_end]
+        return ''.join(parts)
+
 
-        text += c_end + r_end + t_end
-        return text
\ No newline at end of file
+def encode_all(evidences: List[Evidence],
+               encoding: str = 'compact') -> List[str]:
+    """
+    Encodes a list of Evidence objects with the same encoding.
+    Each Evidence keeps its encoded text, so encoding it again is free.
+
+    :param evidences: list of Evidence objects
+    :param encoding: encoding to use, 'compact' or 'totto'
+    :return: the encoded texts, in the same order as evidences
+    """
+    if encoding not in ['compact', 'totto']:
+        raise ValueError('Invalid choice of encoding')
+    return [e.to_text(encoding) for e in evidences]
@@ -1,5 +1,9 @@
+import json
+import os
+import time
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from collections import Counter
+from typing import Iterator, List, Tuple
 
 import numpy as np
 from feverous.database.feverous_db import FeverousDB
@@ -8,10 +12,13 @@ from feverous.utils.wiki_page import WikiTable
 from feverous.utils.wiki_table import Cell
 
 from ...logger import logger
+from ...pipeline.memo import code_fingerprint
+from ...pipeline.memo import stat_fingerprint
 from ..evidence import Evidence
 from ..evidence import EvidencePiece
 from ..evidence_retriever import EvidenceRetriever
 
+from .rejections import RejectionStats
 from .utils import TableException
 from .utils import TableExceptionType
 from .utils import check_header_left
@@ -36,7 +43,8 @@ class FeverousRetriever(EvidenceRetriever, ABC):
                  evidence_per_table: int = 1,
                  column_per_table: int = 2,
                  seed: int = None,
-                 verbose: bool = False):
+                 verbose: bool = False,
+                 rejection_path: str = None):
         """
 
         :param p_dataset: path of the dataset
@@ -49,6 +57,8 @@ class FeverousRetriever(EvidenceRetriever, ABC):
         :param column_per_table: how many cells for 1 Evidence
         :param seed: used for reproducibility
         :param verbose:if True, prints additional info during retrieval
+        :param rejection_path: if given, the rejections are written to this
+                               JSON file at the end of each scan
         """
         super().__init__(n_pieces=num_positive, verbose=verbose)
 
@@ -72,6 +82,49 @@ class FeverousRetriever(EvidenceRetriever, ABC):
         # Random generator for reproducibility purposes
         self.rng = np.random.default_rng(self.seed)
 
+        # rejected pages and tables of all the scans, for each TableExceptionType
+        self.rejections = RejectionStats()
+        self.rejection_path = rejection_path
+
+    def __getstate__(self):
+        # the SQLite connection cannot be pickled, it is reopened on unpickling
+        state = self.__dict__.copy()
+        del state['db']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.db = FeverousDB(self.path_db)
+
+    def get_worker_state(self):
+        # changed by every scan: the shuffled ids, the random generator and the rejections
+        return {'ids': self.ids,
+                'rng': self.rng.bit_generator.state,
+                'rejections': self.rejections}
+
+    def set_worker_state(self, state):
+        self.ids = state['ids']
+        self.rng.bit_generator.state = state['rng']
+        self.rejections = state['rejections']
+
+    def cache_key(self) -> str:
+        """
+        The retrieved evidences depend on the parameters of the retriever,
+        including the seed, on the database and on the code of src/evidence.
+        The database is identified by its path, size and modification time.
+
+        :return: the key used to memoize the output in a StageMemo
+        """
+        params = {k: v for k, v in self.__dict__.items()
+                  if not k.startswith('_') and k not in ['db', 'path_db', 'ids', 'rng', 'verbose',
+                                                         'rejections', 'rejection_path']}
+        evidence_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return json.dumps({'class': type(self).__name__,
+                           'params': params,
+                           'db': stat_fingerprint(self.path_db),
+                           'code': code_fingerprint(evidence_dir)},
+                          sort_keys=True, default=repr)
+
     @property
     def retrieve(self
                  ) -> List[Evidence]:
@@ -107,76 +160,109 @@ class FeverousRetriever(EvidenceRetriever, ABC):
 
         :return: a list of Evidence objects composed of positive + negative
         """
-        self.rng.shuffle(self.ids)  # shuffle the ids
-
-        discarded_ids = dict()  # used to understand how many discarded pages
-        discarded_ids[TableExceptionType.NO_ENOUGH_TBL.value] = []
-        discarded_ids[TableExceptionType.NO_EXTRACTED_TBL.value] = []
-
-        total_positive_evidences = []
-        total_negative_evidences = []
-        for page_name in self.ids:
-            if self.verbose:
-                logger.info(f" wikipage: {page_name}".encode("utf-8"))
-
-            # retrieve the page
-            page_json = self.db.get_doc_json(page_name)
+        evidences = list(self.iter_evidence())
+        return [e for e in evidences if e.label == 'SUPPORTS'] + \
+               [e for e in evidences if e.label == 'REFUTES']
 
-            # parse the page in WikiPage format
-            wiki_page = WikiPage(page_name, page_json)
-
-            # Get all the tables
-            tables = wiki_page.get_tables()
-
-            if len(tables) < self.table_per_page:
-                discarded_ids["NO_ENOUGH_TBL"] += [page_name]
-                continue
-
-            try:
-                # analyze the tables of the wiki page
-                pos_evidences, neg_evidences = self.analyze_tables(tables, wiki_page)
-            except TableException as e:
-                discarded_ids[e.error[0].value] += [e.error[1]]
-            else:
-                # compute only if no error
-                if len(total_positive_evidences) < self.num_positive:
-                    total_positive_evidences = total_positive_evidences + pos_evidences
-
-                if len(total_negative_evidences) < self.num_negative:
-                    total_negative_evidences = total_negative_evidences + neg_evidences
+    def iter_evidence(self) -> Iterator[Evidence]:
+        """
+        Scans the FEVEROUS dataset like retrieve, but yields the Evidence objects
+        of each page as soon as the page is analyzed, positive ones first.
+        It stops once both num_positive and num_negative evidences are yielded.
+        The rejected pages and tables are counted in self.rejections.
 
-            if len(total_positive_evidences) >= self.num_positive and \
-                    len(total_negative_evidences) >= self.num_negative:
-                total_positive_evidences = total_positive_evidences[:self.num_positive]
-                total_negative_evidences = total_negative_evidences[:self.num_negative]
+        :return: an iterator over Evidence objects
+        """
+        self.rng.shuffle(self.ids)  # shuffle the ids
 
-                break
+        n_scanned = 0
+        discarded = Counter()  # number of discarded pages for each TableExceptionType
+
+        n_positive = 0
+        n_negative = 0
+        retrieved = Counter()  # number of evidences for each (label, table type)
+        try:
+            for page_name in self.ids:
+                if self.verbose:
+                    logger.info(f" wikipage: {page_name}".encode("utf-8"))
+                start = time.perf_counter()
+                n_scanned += 1
+
+                # retrieve the page
+                page_json = self.db.get_doc_json(page_name)
+
+                # parse the page in WikiPage format
+                wiki_page = WikiPage(page_name, page_json)
+
+                # Get all the tables
+                tables = wiki_page.get_tables()
+
+                reason = None
+                evidences = []
+                if len(tables) < self.table_per_page:
+                    reason = TableExceptionType.NO_ENOUGH_TBL
+                else:
+                    try:
+                        # analyze the tables of the wiki page
+                        pos_evidences, neg_evidences = self.analyze_tables(tables, wiki_page)
+                    except TableException as e:
+                        reason = e.error[0]
+                    else:
+                        # compute only if no error, without exceeding the requested number
+                        pos_evidences = pos_evidences[:max(self.num_positive - n_positive, 0)]
+                        neg_evidences = neg_evidences[:max(self.num_negative - n_negative, 0)]
+                        n_positive += len(pos_evidences)
+                        n_negative += len(neg_evidences)
+                        evidences = pos_evidences + neg_evidences
+
+                # timed before yielding, the consumer of the evidences is not counted
+                seconds = time.perf_counter() - start
+                self.rejections.add_page(seconds)
+                if reason is not None:
+                    discarded[reason] += 1
+                    self.rejections.reject_page(reason, seconds, page_name)
+                for e in evidences:
+                    retrieved[(e.label, e.type_table)] += 1
+                    yield e
+
+                if n_positive >= self.num_positive and n_negative >= self.num_negative:
+                    break
+        finally:
+            # also written when the iteration is abandoned, e.g. by a stopped stream
+            if self.rejection_path is not None:
+                self.rejections.write(self.rejection_path)
 
         if self.verbose:
             logger.info(
                 f" Positive Evidences retrieved"
-                f" {len(total_positive_evidences)}/{self.num_positive}"
+                f" {n_positive}/{self.num_positive}"
             )
             logger.info(
                 f" Negative Evidences retrieved"
-                f" {len(total_negative_evidences)}/{self.num_negative}"
+                f" {n_negative}/{self.num_negative}"
             )
             logger.info(f'POSITIVE Evidence retrieved from ENTITY table:'
-                        f'{len([1 for e in total_positive_evidences if e.type_table == "entity"])}')
+                        f'{retrieved[("SUPPORTS", "entity")]}')
             logger.info(f'POSITIVE Evidence retrieved from RELATIONAL table:'
-                        f'{len([1 for e in total_positive_evidences if e.type_table == "relational"])}')
+                        f'{retrieved[("SUPPORTS", "relational")]}')
 
             logger.info(f'NEGATIVE Evidence retrieved from ENTITY table:'
-                        f'{len([1 for e in total_negative_evidences if e.type_table == "entity"])}')
+                        f'{retrieved[("REFUTES", "entity")]}')
             logger.info(f'NEGATIVE Evidence retrieved from RELATIONAL table:'
-                        f'{len([1 for e in total_negative_evidences if e.type_table == "relational"])}')
-            logger.info(f"Page Id not used {len(discarded_ids)}/{len(self.ids)}")
+                        f'{retrieved[("REFUTES", "relational")]}')
+            logger.info(f"Page Id not used {sum(discarded.values())}/{n_scanned}")
 
-            logger.info(f' Id error NO_ENOUGH_TBL  {len(discarded_ids["NO_ENOUGH_TBL"])}')
+            logger.info(f' Id error NO_ENOUGH_TBL  '
+                        f'{discarded[TableExceptionType.NO_ENOUGH_TBL]}')
             logger.info(f' Id error NO_EXTRACTED_TBL  '
-                        f'{len(discarded_ids["NO_EXTRACTED_TBL"])}')
+                        f'{discarded[TableExceptionType.NO_EXTRACTED_TBL]}')
+            logger.info(self.rejections)
 
-        return total_positive_evidences + total_negative_evidences
+    def stream(self, items=None) -> Iterator[Evidence]:
+        """
+        Streaming version of retrieve, the input is ignored.
+        """
+        return self.iter_evidence()
 
     def analyze_tables(self,
                        tables: List,
@@ -203,6 +289,7 @@ class FeverousRetriever(EvidenceRetriever, ABC):
             # Check how many evidences we have extracted from this wikipage
             if count_extracted >= self.table_per_page:
                 break
+            start = time.perf_counter()
 
             # get Table id
             tbl_id = int(tbl.get_id().split('_')[1])
@@ -229,26 +316,32 @@ class FeverousRetriever(EvidenceRetriever, ABC):
                 evidence_from_table = self.get_evidence_from_table(tbl,
                                                                    header_left,
                                                                    table_len)
-            except TableException:
-                pass  # not raise because want to scan the other tables
+            except TableException as e:
+                # not raise because want to scan the other tables
+                self.rejections.reject_table(e.error[0], time.perf_counter() - start,
+                                             wiki_page.title)
 
             else:  # if no exception has occurred
                 count_extracted += 1  # successfully extracted
                 positive_evidences += create_positive_evidence(
                     deepcopy(evidence_from_table), current_table_type)
 
+                negative_start = time.perf_counter()
                 try:
                     negative_evidences += create_negative_evidence(
                         deepcopy(evidence_from_table), self.wrong_cell, self.rng, tbl,
                         current_table_type)
-                except TableException:
+                except TableException as e:
                     # if not possible to create negative, continue with other tables
-                    pass
+                    self.rejections.reject_table(e.error[0],
+                                                 time.perf_counter() - negative_start,
+                                                 wiki_page.title)
+            self.rejections.add_table(time.perf_counter() - start)
 
         # Not enough evidence extracted from all the tables
         if count_extracted < self.table_per_page:
             raise TableException(
-                TableExceptionType.NO_ENOUGH_TBL,
+                TableExceptionType.NO_EXTRACTED_TBL,
                 wiki_page.title
             )
 
@@ -15,10 +15,10 @@ class FeverousRetrieverRandom(FeverousRetriever):
     def __init__(self, p_dataset: str, num_positive: int, num_negative: int,
                  table_type: str, wrong_cell: int, table_per_page=1, evidence_per_table=1,
                  column_per_table=2, key_strategy=None, seed=None, verbose=False,
-                 ):
+                 rejection_path=None):
         super().__init__(p_dataset, num_positive, num_negative, table_type, wrong_cell,
                          table_per_page, evidence_per_table, column_per_table, seed,
-                         verbose)
+                         verbose, rejection_path=rejection_path)
         self.key_strategy = key_strategy
 
     def get_evidence_from_table(self,
@@ -31,56 +31,67 @@ def entity_table(
     :return selected_h_cells: ['name', 'scored_gol']
     :return alternative_pieces: the swappable cells for each header
     """
-    # header_left [(header_cell, row_number, content), ... ]
-    header_left = np.array(header_left)
-
     # Not enough rows
     if len(header_left) < column_per_table:
         raise TableException(TableExceptionType.NO_ENOUGH_ROW, tbl.page)
 
-    selected_h = rng.choice(header_left,
-                            column_per_table,
-                            replace=False)
+    # work on indices so that the Cells never end up in numpy object arrays
+    selected_h_idx = rng.choice(len(header_left),
+                                column_per_table,
+                                replace=False)
+    selected_h = [header_left[i] for i in selected_h_idx]
 
     # Now we need to select the cells from the selected headers
-    rows = np.array(tbl.get_rows())
-    i = [int(h.row_num) for h in selected_h]
-
-    selected_rows = rows[i]  # take only the selected row
-
-    extracted_cell = []
-    alternative_pieces = []
-    for r in selected_rows:
+    rows = tbl.get_rows()
+    selected_rows = [rows[int(h.row_num)].row for h in selected_h]
 
-        # Obtain first the unique cells form the entity table
-        unique_cells = [r.row[0]]  # The first cell is the header
-        for c in r.row[1:]:  # take all the other cells of the row
-            if c.content in [u.content for u in unique_cells if u != -1]:
-                unique_cells.append(-1)  # Not useful
-            elif c.content == "":
-                unique_cells.append(-1)  # Not useful
-            elif c.is_header:
-                unique_cells.append(-1)  # Not useful
-            else:
-                unique_cells.append(c)  # if everything ok, append the cell
-        alternative_pieces.append(unique_cells[1:])
+    # the rows of an entity table may have different lengths,
+    # missing positions are simply marked as not valid
+    n_cols = max(len(r) for r in selected_rows) - 1
+    valid = np.zeros((len(selected_rows), max(n_cols, 0)), dtype=bool)
+    for i, r in enumerate(selected_rows):
+        valid[i, :len(r) - 1] = unique_cells_mask(r)
 
-    alternative_pieces = np.array(alternative_pieces)
-
-    # this masks contains the row that have all the cells to be extractable (no empty,...)
-    mask = [(p != -1).all() for p in alternative_pieces.T]
-
-    # mantain all the rows but keep only the correct column from which we can
-    possible_cols = np.arange(0, alternative_pieces.shape[1])
-    possible_cols = possible_cols[mask]  # remove not possible cell
+    # columns where every selected row has an extractable cell (no empty,...)
+    possible_cols = np.flatnonzero(valid.all(axis=0))
 
     if len(possible_cols) < evidence_per_table:
         raise TableException(TableExceptionType.NO_ENOUGH_ROW, tbl.page)
 
-        # Select from the unique cells the random extracted cell
+    # Select from the unique cells the random extracted cell
     selected_col = rng.choice(possible_cols,
                               evidence_per_table,
                               replace=False)
-    selected_evidences = alternative_pieces[:, selected_col].T
+
+    # map the indices back to the cells, -1 marks a cell that cannot be swapped
+    alternative_pieces = [
+        [r[j + 1] if valid[i, j] else -1 for j in range(n_cols)]
+        for i, r in enumerate(selected_rows)
+    ]
+    selected_evidences = [
+        [r[j + 1] for r in selected_rows]
+        for j in selected_col
+    ]
 
     return selected_evidences, selected_h, alternative_pieces
+
+
+def unique_cells_mask(row: List[Cell]) -> np.ndarray:
+    """
+    Flags the cells of an entity table row that can be used as evidence.
+    The first cell is the left header and it is not part of the output.
+    A cell is discarded if it is empty, it is a header or its content
+    already appeared before in the row (header included).
+
+    :param row: the cells of the row, header left first
+
+    :return: boolean mask of length len(row) - 1, True if the cell is usable
+    """
+    seen = {row[0].content}  # The first cell is the header
+    mask = np.zeros(len(row) - 1, dtype=bool)
+    for j, c in enumerate(row[1:]):  # take all the other cells of the row
+        if c.content in seen or c.content == "" or c.is_header:
+            continue  # Not useful
+        seen.add(c.content)
+        mask[j] = True
+    return mask
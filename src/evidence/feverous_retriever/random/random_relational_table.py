@@ -1,6 +1,6 @@
+from functools import lru_cache
 from typing import List, Tuple, Any
 import numpy as np
-import spacy
 from feverous.utils.wiki_table import Cell
 from feverous.utils.wiki_page import WikiTable
 from ..utils import TableException
@@ -308,7 +308,7 @@ def _key_entity(table: WikiTable,
     :param start_row: Row to begin analysis from
     :param end_row: Row to end analysis at
     """
-    NER = spacy.load("en_core_web_sm")
+    NER = _load_ner()
     table_id = int(table.get_id().split('_')[1])
     # Find candidate columns with all unique values and compute their scores
     candidates_scores = []
@@ -330,6 +330,16 @@ def _key_entity(table: WikiTable,
     return np.argmax(candidates_scores)
 
 
+@lru_cache(maxsize=None)
+def _load_ner():
+    """
+    Loads the spaCy NER model on first use and keeps it for the next tables,
+    so spaCy is not imported unless the 'entity' key strategy is used.
+    """
+    import spacy
+    return spacy.load("en_core_web_sm")
+
+
 def _get_type(n: Any):
     if n.isdigit():
         return int
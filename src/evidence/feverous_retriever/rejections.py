@@ -0,0 +1,129 @@
+import json
+from typing import Dict
+
+from .utils import TableExceptionType
+
+
+class RejectionStats:
+    """
+    Counts the pages and tables rejected by a FeverousRetriever for each
+    TableExceptionType, with the time spent on them before the rejection,
+    i.e. the retrieval work that produced no evidence.
+
+    Page rejections (NO_ENOUGH_TBL, NO_EXTRACTED_TBL) are timed from the
+    database read to the rejection, so their time includes the one of the
+    rejected tables of the page. Table rejections are timed from the header
+    check to the rejection, NO_NEGATIVE_SENT counts the tables whose
+    negative evidences could not be created.
+    """
+
+    def __init__(self, max_examples: int = 5):
+        """
+        :param max_examples: number of rejected page names kept for each reason
+        """
+        self.max_examples = max_examples
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the pages and tables counted so far.
+        """
+        self.n_pages = 0
+        self.n_tables = 0
+        self.page_seconds = 0.0
+        self.table_seconds = 0.0
+        self.rejected_pages = {t: 0 for t in TableExceptionType}
+        self.rejected_tables = {t: 0 for t in TableExceptionType}
+        self.rejected_page_seconds = {t: 0.0 for t in TableExceptionType}
+        self.rejected_table_seconds = {t: 0.0 for t in TableExceptionType}
+        self.examples = {t: [] for t in TableExceptionType}
+
+    def add_page(self, seconds: float):
+        """
+        Counts a scanned page, whether it was rejected or not.
+
+        :param seconds: time spent on the page
+        """
+        self.n_pages += 1
+        self.page_seconds += seconds
+
+    def add_table(self, seconds: float):
+        """
+        Counts an analyzed table, whether it was rejected or not.
+
+        :param seconds: time spent on the table
+        """
+        self.n_tables += 1
+        self.table_seconds += seconds
+
+    def reject_page(self,
+                    reason: TableExceptionType,
+                    seconds: float,
+                    page: str):
+        """
+        :param reason: why the page was rejected
+        :param seconds: time spent on the page before the rejection
+        :param page: name of the page
+        """
+        self.rejected_pages[reason] += 1
+        self.rejected_page_seconds[reason] += seconds
+        self._example(reason, page)
+
+    def reject_table(self,
+                     reason: TableExceptionType,
+                     seconds: float,
+                     page: str):
+        """
+        :param reason: why the table was rejected
+        :param seconds: time spent on the table before the rejection
+        :param page: name of the page of the table
+        """
+        self.rejected_tables[reason] += 1
+        self.rejected_table_seconds[reason] += seconds
+        self._example(reason, page)
+
+    def _example(self, reason, page):
+        if len(self.examples[reason]) < self.max_examples:
+            self.examples[reason].append(str(page))
+
+    @property
+    def n_rejected_pages(self) -> int:
+        return sum(self.rejected_pages.values())
+
+    def to_dict(self) -> Dict:
+        """
+        :return: dictionary with the totals and, for each TableExceptionType,
+                 the rejected pages and tables, the seconds spent on them and
+                 some example page names
+        """
+        return {
+            'pages': self.n_pages,
+            'tables': self.n_tables,
+            'page_seconds': self.page_seconds,
+            'table_seconds': self.table_seconds,
+            'reasons': {t.value: {'pages': self.rejected_pages[t],
+                                  'tables': self.rejected_tables[t],
+                                  'page_seconds': self.rejected_page_seconds[t],
+                                  'table_seconds': self.rejected_table_seconds[t],
+                                  'examples': list(self.examples[t])}
+                        for t in TableExceptionType},
+        }
+
+    def write(self, path: str):
+        """
+        :param path: JSON file where to_dict is written
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def __str__(self):
+        stats = self.to_dict()
+        lines = [f'Pages rejected {self.n_rejected_pages}/{stats["pages"]} '
+                 f'({stats["page_seconds"]:.2f}s spent on pages, '
+                 f'{stats["table_seconds"]:.2f}s on {stats["tables"]} tables)']
+        for reason, r in stats['reasons'].items():
+            if r['pages'] == 0 and r['tables'] == 0:
+                continue
+            lines.append(f'  {reason:<18} pages {r["pages"]:>7} {r["page_seconds"]:>8.2f}s'
+                         f'  tables {r["tables"]:>7} {r["table_seconds"]:>8.2f}s')
+        return '\n'.join(lines)
@@ -1,7 +1,21 @@
 from .pipeline import PipelineElement
 from .pipeline import ClaimGeneratorPipeline
+from .pipeline import PipelineError
+from .pipeline import Batch
+from .micro_batch import MicroBatchElement
+from .memo import StageMemo
+from .profiling import StageProfiler
+from .stats import PipelineStats
+from .stats import ElementStats
 
 __all__ = [
     "PipelineElement",
     "ClaimGeneratorPipeline",
+    "PipelineError",
+    "Batch",
+    "MicroBatchElement",
+    "StageMemo",
+    "StageProfiler",
+    "PipelineStats",
+    "ElementStats",
 ]
@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import os
+import pickle
+from functools import lru_cache
+from typing import Any, Tuple
+
+MEMO_FORMAT = 2  # part of the keys, outputs stored by older versions are not read
+
+
+def stat_fingerprint(path: str) -> str:
+    """
+    Cheap fingerprint of a large file (e.g. the FEVEROUS database), based on
+    its absolute path, size and modification time instead of its content.
+
+    :param path: path of the file
+    :return: string changing whenever the file is replaced or modified
+    """
+    stat = os.stat(path)
+    return f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}'
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint(directory: str) -> str:
+    """
+    Hashes the Python sources under directory, so that memoized outputs are
+    invalidated when the code producing them changes.
+
+    :param directory: root of the package to hash
+    :return: hex digest of the sources
+    """
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith('.py'):
+                continue
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, directory).encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+class StageMemo:
+    """
+    Stores the outputs of the PipelineElements of a ClaimGeneratorPipeline on
+    disk, so that later runs with the same configuration reuse them instead of
+    running the element again (e.g. the retrieval when only the generator
+    settings change). Only elements whose cache_key is not None are memoized.
+
+    An output is identified by the element cache_key, the hash of the element
+    input and the number of previous calls of the element in the pipeline, so
+    a run calling a seeded retriever several times gets the same outputs as
+    without memoization. The worker state of the element (e.g. its random
+    generator) is stored with the output and restored when the output is
+    reused, so the following calls continue from it. Outputs are stored as
+    gzip-compressed pickles, one file per output.
+    """
+
+    def __init__(self,
+                 directory: str,
+                 compress_level: int = 6):
+        """
+        :param directory: where the outputs are stored, created if missing
+        :param compress_level: gzip compression level, from 0 to 9
+        """
+        self.directory = directory
+        self.compress_level = compress_level
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(element_key: str,
+                 call_index: int,
+                 element_input: Any) -> str:
+        """
+        :param element_key: cache_key of the element
+        :param call_index: number of previous calls of the element
+        :param element_input: input of the call, must be picklable
+        :return: key of the output in the memo
+        """
+        digest = hashlib.sha256()
+        digest.update(f'{MEMO_FORMAT}:'.encode('utf-8'))
+        digest.update(element_key.encode('utf-8'))
+        digest.update(f':{call_index}:'.encode('utf-8'))
+        digest.update(pickle.dumps(element_input, protocol=pickle.HIGHEST_PROTOCOL))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Tuple[bool, Any, Any]:
+        """
+        :param key: key from make_key
+        :return: whether the output was found, the output and the worker
+                 state of the element after the call
+        """
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rb') as f:
+                output, state = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return False, None, None
+        self.hits += 1
+        return True, output, state
+
+    def put(self, key: str, output: Any, state: Any = None):
+        """
+        :param key: key from make_key
+        :param output: output of the element, must be picklable
+        :param state: worker state of the element after the call, see
+                      PipelineElement.get_worker_state
+        """
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with gzip.open(tmp_path, 'wb', compresslevel=self.compress_level) as f:
+            pickle.dump((output, state), f, protocol=pickle.HIGHEST_PROTOCOL)
+        # readers never see a partially written output
+        os.replace(tmp_path, path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.pkl.gz')
@@ -0,0 +1,131 @@
+import queue
+import threading
+import time
+from typing import Any, Iterable, Iterator, List, Optional
+
+from .pipeline import Batch
+from .pipeline import PipelineElement
+
+
+class _End:
+    """Put in the buffer when the upstream iterator is exhausted"""
+
+
+class _Failure:
+    """Put in the buffer when the upstream iterator raised"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DEADLINE = object()  # returned instead of an item when a batch deadline is reached
+
+
+class MicroBatchElement(PipelineElement):
+    """
+    Gathers the items of a streaming pipeline into batches, e.g. between an
+    EvidenceRetriever emitting evidences page by page and a
+    TextualClaimGenerator that is faster on large batches of evidences of
+    similar length. A batch is emitted when it holds max_batch_size items or
+    max_wait seconds after its first item arrived, whichever comes first.
+
+    With ClaimGeneratorPipeline.generate the whole input is already one batch:
+    the items are returned unchanged (sorted if sort_by_length).
+    """
+
+    def __init__(self,
+                 max_batch_size: int = 64,
+                 max_wait: float = 1.0,
+                 sort_by_length: bool = False,
+                 encoding: str = None):
+        """
+        :param max_batch_size: number of items that triggers a batch
+        :param max_wait: seconds the first item of a batch waits for the others,
+                         None waits until the batch is full
+        :param sort_by_length: if True the items of a batch are sorted by the
+                               length of their encoded text, so that the
+                               generator batches have less padding
+        :param encoding: encoding of the Evidence items, used to measure
+                         their length when sort_by_length is True
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"Expected max_batch_size >= 1 but got {max_batch_size}")
+        if sort_by_length and encoding is None:
+            raise ValueError("sort_by_length requires the encoding of the evidences")
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.sort_by_length = sort_by_length
+        self.encoding = encoding
+        self.n_batches = 0
+        self.n_items = 0
+
+    def _sorted(self, items: List[Any]) -> List[Any]:
+        if not self.sort_by_length:
+            return items
+        return sorted(items, key=lambda e: len(e.to_text(self.encoding)))
+
+    def __call__(self, *args, **kwargs):
+        return self._sorted(list(args[0]))
+
+    def stream(self, items: Optional[Iterable[Any]]) -> Iterator[Batch]:
+        if items is None:
+            raise ValueError("MicroBatchElement cannot be the first element of a pipeline")
+
+        # the upstream items are read by a thread, so the deadline of a batch
+        # is respected even while the upstream element is busy
+        buffer = queue.Queue(self.max_batch_size)
+        closed = threading.Event()
+
+        def put(item):
+            while not closed.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def read():
+            try:
+                for item in items:
+                    if not put(item):
+                        return
+                put(_End())
+            except BaseException as e:
+                put(_Failure(e))
+
+        threading.Thread(target=read, daemon=True).start()
+        try:
+            batch = []
+            deadline = None
+            while True:
+                timeout = None
+                if deadline is not None:
+                    timeout = max(deadline - time.monotonic(), 0)
+                try:
+                    item = buffer.get(timeout=timeout)
+                except queue.Empty:
+                    item = _DEADLINE
+
+                if isinstance(item, _Failure):
+                    raise item.error
+                if isinstance(item, _End):
+                    if len(batch) > 0:
+                        yield self._emit(batch)
+                    return
+                if item is not _DEADLINE:
+                    if len(batch) == 0 and self.max_wait is not None:
+                        deadline = time.monotonic() + self.max_wait
+                    batch.append(item)
+                if len(batch) >= self.max_batch_size or \
+                        (item is _DEADLINE and len(batch) > 0):
+                    yield self._emit(batch)
+                    batch = []
+                    deadline = None
+        finally:
+            closed.set()
+
+    def _emit(self, batch: List[Any]) -> Batch:
+        self.n_batches += 1
+        self.n_items += len(batch)
+        return Batch(self._sorted(batch))
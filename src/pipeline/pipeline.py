@@ -1,5 +1,37 @@
+import asyncio
+import queue
+import threading
+import time
 from abc import abstractmethod
-from typing import List, Any, Union
+from contextlib import nullcontext
+from concurrent.futures import Executor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Any, Iterable, Iterator, Optional, Union
+
+from ..logger import logger
+from .memo import StageMemo
+from .profiling import StageProfiler
+from .stats import Measure
+from .stats import PipelineStats
+from .stats import count_items
+from .stats import measure_call
+
+
+class Batch(list):
+    """
+    List of items travelling as a single item in streaming mode, e.g. emitted
+    by a MicroBatchElement. The default PipelineElement.stream passes it to
+    __call__ as is, instead of gathering items in chunks of stream_chunk_size.
+    """
+
+
+def _stream_count(item: Any) -> int:
+    """
+    :return: number of items carried by a streamed item, a Batch counts its content
+    """
+    return len(item) if isinstance(item, Batch) else 1
 
 
 class PipelineElement:
@@ -8,11 +40,87 @@ class PipelineElement:
      executes the main function of the
     block and returns the input of the next.
     """
+    # number of items passed to __call__ at once by the default stream adapter
+    stream_chunk_size = 64
 
     @abstractmethod
     def __call__(self, *args, **kwargs):
         raise NotImplementedError("Must have implemented this.")
 
+    def stream(self, items: Optional[Iterable[Any]]) -> Iterator[Any]:
+        """
+        Streaming version of __call__, used by ClaimGeneratorPipeline.stream.
+        By default the input items are gathered in chunks of stream_chunk_size
+        and each chunk is passed to __call__, elements that can work item by
+        item should override it. A Batch received from upstream is passed
+        to __call__ as one chunk.
+
+        :param items: iterator over the outputs of the previous element,
+                      None for the first element of a pipeline without input
+        :return: iterator over the output items
+        """
+        if items is None:
+            yield from self(None)
+            return
+        chunk = []
+        for item in items:
+            if isinstance(item, Batch):
+                if len(chunk) > 0:
+                    yield from self(chunk)
+                    chunk = []
+                yield from self(list(item))
+                continue
+            chunk.append(item)
+            if len(chunk) >= self.stream_chunk_size:
+                yield from self(chunk)
+                chunk = []
+        if len(chunk) > 0:
+            yield from self(chunk)
+
+    async def acall(self,
+                    input: Any,
+                    executor: Optional[Executor] = None) -> Any:
+        """
+        Asynchronous version of __call__, used by ClaimGeneratorPipeline.agenerate.
+        By default __call__ runs in executor so that the event loop is not
+        blocked, elements with a native asynchronous API should override it.
+
+        :param input: output of the previous element
+        :param executor: where __call__ runs, None uses the default executor of the loop
+        :return: the output of the element
+        """
+        loop = asyncio.get_running_loop()
+        task = _run_in_worker if isinstance(executor, ProcessPoolExecutor) else _run_element
+        output, _ = _finish(self, await loop.run_in_executor(executor, task, self, input))
+        return output
+
+    def cache_key(self) -> Optional[str]:
+        """
+        Identifies everything the output of the element depends on besides its
+        input (parameters, data, seed, code version), used by StageMemo.
+        Elements whose output can be memoized should override it.
+
+        :return: a string changing whenever the output could change,
+                 None if the output must not be memoized
+        """
+        return None
+
+    def get_worker_state(self) -> Any:
+        """
+        State changed by the calls of the element, e.g. a random generator or
+        counters. A process executor runs a copy of the element, this state
+        is sent back from the copy and given to set_worker_state so that the
+        next calls continue from it, as they do in the pipeline process.
+
+        :return: the state, None if there is nothing to send back
+        """
+        return None
+
+    def set_worker_state(self, state: Any):
+        """
+        :param state: returned by get_worker_state on the copy run by a process executor
+        """
+
     def __len__(self):
         return 1
 
@@ -20,6 +128,210 @@ class PipelineElement:
         return iter([self])
 
 
+class PipelineError(Exception):
+    """Raised when a PipelineElement fails, the original error is its cause"""
+
+    def __init__(self,
+                 stage: int,
+                 element: PipelineElement,
+                 error: BaseException):
+        self.stage = stage
+        self.element = element
+        super().__init__(f'Element {type(element).__name__} of stage {stage} '
+                         f'failed with {error!r}')
+
+
+class _StreamEnd:
+    """Put in a queue by a stage thread when it has no more items"""
+
+
+class _StreamFailure:
+    """Put in a queue by a stage thread when its element failed"""
+
+    def __init__(self, error: PipelineError):
+        self.error = error
+
+
+class _StreamStopped(Exception):
+    """Raised in the stage threads when the stream is abandoned"""
+
+
+class _Stream:
+    """
+    Bounded queues and threads running a ClaimGeneratorPipeline in streaming
+    mode. Every element runs in its own thread, reading from the queue of the
+    previous stage and writing to the queue of its stage.
+    """
+
+    def __init__(self,
+                 queue_size: int,
+                 stats: PipelineStats,
+                 profiler: Optional[StageProfiler] = None):
+        self.queue_size = queue_size
+        self.stats = stats
+        self.profiler = profiler
+        self.stop = threading.Event()
+        self.threads = []
+
+    def put(self, q: queue.Queue, item: Any):
+        # blocks while the queue is full (backpressure), unless the stream stops
+        while True:
+            if self.stop.is_set():
+                raise _StreamStopped()
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def get(self, q: queue.Queue) -> Any:
+        while True:
+            if self.stop.is_set():
+                raise _StreamStopped()
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    def iterate(self, q: queue.Queue, n_producers: int) -> Iterator[Any]:
+        """
+        Yields the items of q until each of its producers has ended.
+        """
+        ended = 0
+        while ended < n_producers:
+            item = self.get(q)
+            if isinstance(item, _StreamEnd):
+                ended += 1
+            elif isinstance(item, _StreamFailure):
+                raise item.error
+            else:
+                yield item
+
+    def start(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def run_element(self, stage, branch, element, items, out_queue):
+        consumed = [0]
+        upstream_failure = []  # PipelineError of a previous stage, raised by the upstream items
+
+        def counted(upstream):
+            while True:
+                try:
+                    upstream_item = next(upstream)
+                except StopIteration:
+                    return
+                except PipelineError as e:
+                    upstream_failure.append(e)
+                    raise
+                consumed[0] += _stream_count(upstream_item)
+                yield upstream_item
+
+        profiled = nullcontext()
+        if self.profiler is not None:
+            profiled = self.profiler.profile(stage, element)
+        try:
+            with Measure() as call, profiled:
+                output = element.stream(None if items is None else counted(items))
+                wall = 0.0
+                while True:
+                    # time spent in the element, including the wait for upstream items
+                    start = time.perf_counter()
+                    try:
+                        item = next(output)
+                    except StopIteration:
+                        wall += time.perf_counter() - start
+                        break
+                    wall += time.perf_counter() - start
+                    call.items_out += _stream_count(item)
+                    self.put(out_queue, item)
+            call.wall = wall
+            call.items_in = consumed[0]
+            self.stats.record(stage, branch, element, call)
+        except _StreamStopped:
+            return
+        except Exception as e:
+            if len(upstream_failure) > 0 and e is upstream_failure[0]:
+                # failure of a previous stage, passed on as is
+                self._fail(out_queue, e)
+                return
+            error = PipelineError(stage, element, e)
+            error.__cause__ = e
+            self._fail(out_queue, error)
+            return
+        try:
+            self.put(out_queue, _StreamEnd())
+        except _StreamStopped:
+            pass
+
+    def fan_out(self, items, branch_queues):
+        """
+        Copies every item to the input queue of each branch of a stage.
+        """
+        try:
+            for item in items:
+                for q in branch_queues:
+                    self.put(q, item)
+            for q in branch_queues:
+                self.put(q, _StreamEnd())
+        except _StreamStopped:
+            return
+        except PipelineError as e:
+            for q in branch_queues:
+                self._fail(q, e)
+
+    def _fail(self, q, error):
+        try:
+            self.put(q, _StreamFailure(error))
+        except _StreamStopped:
+            pass
+
+    def close(self):
+        self.stop.set()
+        for thread in self.threads:
+            thread.join()
+
+
+def _run_element(element: PipelineElement,
+                 element_input: Any,
+                 profiler: Optional[StageProfiler] = None,
+                 stage: int = None):
+    """
+    Runs one element, module level so that process executors can pickle it.
+    The profiler is only given when the element runs in the pipeline process.
+
+    :return: the output of the element and the CallStats of the call
+    """
+    if profiler is None:
+        return measure_call(element, element_input)
+    with profiler.profile(stage, element):
+        return measure_call(element, element_input)
+
+
+def _run_in_worker(element: PipelineElement,
+                   element_input: Any):
+    """
+    Runs the copy of an element in a process executor.
+
+    :return: the output of the element, the CallStats of the call and the
+             worker state of the copy
+    """
+    output, call = measure_call(element, element_input)
+    return output, call, element.get_worker_state()
+
+
+def _finish(element: PipelineElement, result: tuple):
+    """
+    Gives the worker state returned by _run_in_worker back to the element.
+
+    :return: the output of the element and the CallStats of the call
+    """
+    if len(result) == 3 and result[2] is not None:
+        element.set_worker_state(result[2])
+    return result[0], result[1]
+
+
 class ClaimGeneratorPipeline:
     """
     Runs a claim generation task starting from raw data all the way to textual claims.
@@ -30,24 +342,323 @@ class ClaimGeneratorPipeline:
     """
 
     def __init__(self,
-                 elements: List[Union[PipelineElement,List[PipelineElement]]]):
+                 elements: List[Union[PipelineElement,List[PipelineElement]]],
+                 executor: Union[None, str, Executor, List[Union[None, str, Executor]]] = None,
+                 max_workers: int = None,
+                 memo: Optional[StageMemo] = None,
+                 profiler: Optional[StageProfiler] = None):
+        """
+        :param elements: the PipelineElements, or lists of them, run in sequence
+        :param executor: how the elements of a list run. None runs them one
+                         after the other, 'thread' in a thread pool (for I/O or
+                         native code such as model inference), 'process' in a
+                         process pool (for Python-bound retrievers, elements are
+                         pickled), or an Executor instance. A list gives one
+                         value per element of the pipeline.
+        :param max_workers: size of the pools created for 'thread' and 'process'
+        :param memo: optional StageMemo, generate reuses the stored outputs of
+                     the elements with a cache_key instead of running them.
+                     stream, astream and agenerate do not use it
+        :param profiler: optional StageProfiler, the elements of its stages run
+                         under it. Start it (or use it as a context manager)
+                         around the run in sampling mode
+        """
         self.elements = elements
+        if not isinstance(executor, list):
+            executor = [executor] * len(elements)
+        if len(executor) != len(elements):
+            raise ValueError(f"Expected one executor per element ({len(elements)}) "
+                             f"but got {len(executor)}")
+        for e in executor:
+            if not (e is None or e in ['thread', 'process'] or isinstance(e, Executor)):
+                raise ValueError(f"Expected executor in [None, 'thread', 'process'] "
+                                 f"or an Executor but got {e}")
+        self.executor = executor
+        self.max_workers = max_workers
+        self._pools = {}  # pools created by the pipeline, by kind
+        self.stats = PipelineStats()  # per-element statistics of all the runs
+        self.memo = memo
+        self.profiler = profiler
+        self._n_calls = {}  # (stage, branch) -> number of generate calls
 
     @abstractmethod
     def generate(self,
                  input: Any = None):
         """
         Runs the whole pipeline on the provided table.
+        Elements memoized in a StageMemo are only run if their output is not stored.
 
         :param input: pipeline input
         :returns A list of textual claims
         """
         next_input = input
         # Calls __call__ method for each element in sequence
-        for pip_element in self.elements:
+        for stage, pip_element in enumerate(self.elements):
+            branch_outputs = self._run_stage(stage, list(pip_element), next_input)
+            # concatenated in the order of the list, whatever finished first
             element_output = []
-            for paral_element in pip_element:
-                element_output += paral_element(next_input)
+            for output in branch_outputs:
+                element_output += output
             next_input = element_output
         pipeline_output = next_input
         return pipeline_output
+
+    def stream(self,
+               input: Optional[Iterable[Any]] = None,
+               queue_size: int = 128) -> Iterator[Any]:
+        """
+        Runs the pipeline in streaming mode: each PipelineElement runs in its
+        own thread and consumes the items of the previous one through bounded
+        queues, so retrieval and generation overlap and at most queue_size
+        items wait between two stages. Elements are driven by their stream
+        method. The elements of a list all receive every item and their
+        outputs are interleaved in the order they are produced.
+        The executor configuration and the memo are not used in this mode.
+
+        :param input: pipeline input, an iterable of items or None
+        :param queue_size: maximum number of items waiting between two stages
+        :return: iterator over the output items of the last element
+        """
+        self._warn_memo_unused('stream')
+        runner = _Stream(queue_size, self.stats, self.profiler)
+        items = None if input is None else iter(input)
+        try:
+            for stage, pip_element in enumerate(self.elements):
+                branches = list(pip_element)
+                out_queue = queue.Queue(queue_size)
+                if items is None:
+                    inputs = [None] * len(branches)
+                elif len(branches) == 1:
+                    inputs = [items]
+                else:
+                    # each branch reads its own copy of the upstream items
+                    branch_queues = [queue.Queue(queue_size) for _ in branches]
+                    runner.start(runner.fan_out, items, branch_queues)
+                    inputs = [runner.iterate(q, 1) for q in branch_queues]
+                for branch, (element, element_input) in enumerate(zip(branches, inputs)):
+                    runner.start(runner.run_element, stage, branch, element, element_input, out_queue)
+                items = runner.iterate(out_queue, len(branches))
+            yield from items
+        finally:
+            runner.close()
+
+    async def agenerate(self,
+                        input: Any = None,
+                        timeout: Optional[float] = None):
+        """
+        Asynchronous version of generate for asyncio applications. The elements
+        run through their acall method, so blocking retrieval and model calls
+        are offloaded to the stage executors (the default executor of the loop
+        for stages without one) and the elements of a list run concurrently.
+        If the call is cancelled or times out, no further stage is started;
+        calls already running in a thread finish but their output is dropped.
+        The memo is not used in this mode.
+
+        :param input: pipeline input
+        :param timeout: seconds before asyncio.TimeoutError is raised, None waits forever
+        :returns A list of textual claims
+        """
+        self._warn_memo_unused('agenerate')
+        return await asyncio.wait_for(self._agenerate(input), timeout)
+
+    async def _agenerate(self, input: Any):
+        next_input = input
+        for stage, pip_element in enumerate(self.elements):
+            branches = list(pip_element)
+            executor = self._get_executor(self.executor[stage])
+            branch_outputs = await asyncio.gather(
+                *[self._acall(stage, branch, element, next_input, executor)
+                  for branch, element in enumerate(branches)])
+            element_output = []
+            for output in branch_outputs:
+                element_output += output
+            next_input = element_output
+        return next_input
+
+    async def _acall(self, stage, branch, element, element_input, executor):
+        try:
+            if type(element).acall is PipelineElement.acall:
+                loop = asyncio.get_running_loop()
+                task, args = self._executor_task(stage, executor)
+                output, call = _finish(element, await loop.run_in_executor(
+                    executor, task, element, element_input, *args))
+            else:
+                with Measure() as call:
+                    output = await element.acall(element_input, executor)
+                call.cpu = 0.0  # the event loop thread also ran other tasks
+                call.items_in = count_items(element_input)
+                call.items_out = count_items(output)
+        except Exception as e:
+            raise PipelineError(stage, element, e) from e
+        self.stats.record(stage, branch, element, call)
+        return output
+
+    async def astream(self,
+                      input: Optional[Iterable[Any]] = None,
+                      queue_size: int = 128,
+                      timeout: Optional[float] = None):
+        """
+        Asynchronous iterator over the output of stream, for asyncio applications.
+        The pipeline runs in background threads and the items are handed to
+        the event loop through a queue of queue_size items. Leaving the
+        iteration early, cancelling it or reaching the timeout stops the
+        pipeline threads.
+
+        :param input: pipeline input, an iterable of items or None
+        :param queue_size: maximum number of items waiting between two stages
+        :param timeout: seconds allowed for the whole iteration, after which
+                        asyncio.TimeoutError is raised, None waits forever
+        :return: asynchronous iterator over the output items of the last element
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        buffer = asyncio.Queue(queue_size)
+        stopped = threading.Event()
+        end = _StreamEnd()
+
+        def put(item):
+            # blocks while the buffer is full, unless the consumer has left
+            if stopped.is_set():
+                return False
+            future = asyncio.run_coroutine_threadsafe(buffer.put(item), loop)
+            while True:
+                try:
+                    future.result(timeout=0.1)
+                    return True
+                except FutureTimeoutError:
+                    if stopped.is_set():
+                        future.cancel()
+                        return False
+
+        def pump():
+            items = self.stream(input, queue_size)
+            try:
+                for item in items:
+                    if not put(item):
+                        return
+                put(end)
+            except Exception as e:
+                put(_StreamFailure(e))
+            finally:
+                items.close()
+
+        threading.Thread(target=pump, daemon=True).start()
+        try:
+            while True:
+                remaining = None if deadline is None else max(deadline - loop.time(), 0)
+                item = await asyncio.wait_for(buffer.get(), remaining)
+                if item is end:
+                    return
+                if isinstance(item, _StreamFailure):
+                    raise item.error
+                yield item
+        finally:
+            stopped.set()
+
+    def _run_stage(self,
+                   stage: int,
+                   branches: List[PipelineElement],
+                   stage_input: Any) -> List[Any]:
+        """
+        Runs the elements of a stage on the same input.
+
+        :return: the output of each element, in the order of branches
+        """
+        outputs = [None] * len(branches)
+        memo_keys = [self._memo_key(stage, branch, element, stage_input)
+                     for branch, element in enumerate(branches)]
+        to_run = []
+        for branch, key in enumerate(memo_keys):
+            found = False
+            if key is not None:
+                found, outputs[branch], state = self.memo.get(key)
+            if found:
+                # the element continues as if it had run
+                if state is not None:
+                    branches[branch].set_worker_state(state)
+                logger.info(f'Stage {stage} {type(branches[branch]).__name__}[{branch}]: '
+                            f'output reused from {self.memo.directory}')
+            else:
+                to_run.append(branch)
+
+        executor = self._get_executor(self.executor[stage])
+        if executor is None or len(to_run) <= 1:
+            for branch in to_run:
+                element = branches[branch]
+                try:
+                    output, call = _run_element(element, stage_input, self.profiler, stage)
+                except Exception as e:
+                    raise PipelineError(stage, element, e) from e
+                self._store(stage, branch, element, memo_keys[branch], output, call)
+                outputs[branch] = output
+            return outputs
+
+        task, args = self._executor_task(stage, executor)
+        futures = [executor.submit(task, branches[branch], stage_input, *args)
+                   for branch in to_run]
+        for branch, future in zip(to_run, futures):
+            element = branches[branch]
+            try:
+                output, call = _finish(element, future.result())
+            except Exception as e:
+                for f in futures:
+                    f.cancel()
+                raise PipelineError(stage, element, e) from e
+            self._store(stage, branch, element, memo_keys[branch], output, call)
+            outputs[branch] = output
+        return outputs
+
+    def _warn_memo_unused(self, mode):
+        if self.memo is not None:
+            logger.warning(f'The StageMemo in {self.memo.directory} is not used by {mode}, '
+                           f'every element runs')
+
+    def _memo_key(self, stage, branch, element, element_input):
+        """
+        :return: key of the output of this call in the memo,
+                 None if the element is not memoized
+        """
+        call_index = self._n_calls.get((stage, branch), 0)
+        self._n_calls[(stage, branch)] = call_index + 1
+        if self.memo is None:
+            return None
+        element_key = element.cache_key()
+        if element_key is None:
+            return None
+        return self.memo.make_key(element_key, call_index, element_input)
+
+    def _store(self, stage, branch, element, key, output, call):
+        self.stats.record(stage, branch, element, call)
+        if key is not None:
+            self.memo.put(key, output, element.get_worker_state())
+
+    def _executor_task(self, stage, executor):
+        """
+        :return: the function running an element of the stage in executor and
+                 its arguments after the element and its input. In a process
+                 pool the worker state of the copy is sent back and the
+                 element is not profiled.
+        """
+        if isinstance(executor, ProcessPoolExecutor):
+            if self.profiler is not None:
+                logger.warning(f'Stage {stage} runs in a process pool, it is not profiled')
+            return _run_in_worker, ()
+        return _run_element, (self.profiler, stage)
+
+    def _get_executor(self, executor):
+        if executor is None or isinstance(executor, Executor):
+            return executor
+        if executor not in self._pools:
+            if executor == 'thread':
+                self._pools[executor] = ThreadPoolExecutor(self.max_workers)
+            else:
+                self._pools[executor] = ProcessPoolExecutor(self.max_workers)
+        return self._pools[executor]
+
+    def close(self):
+        """
+        Shuts down the pools created by the pipeline.
+        """
+        for pool in self._pools.values():
+            pool.shutdown()
+        self._pools = {}
@@ -0,0 +1,283 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Optional
+
+from ..logger import logger
+
+
+def _frame_label(frame) -> str:
+    """
+    :return: 'module:function' of a frame, e.g.
+             'src.evidence.feverous_retriever.utils:check_header_left'
+    """
+    code = frame.f_code
+    module = frame.f_globals.get('__name__', '?')
+    return f'{module}:{getattr(code, "co_qualname", code.co_name)}'
+
+
+def _module_names() -> Dict[str, str]:
+    """
+    :return: dictionary absolute file path -> name of the loaded module
+    """
+    names = {}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None)
+        if path is not None:
+            names[os.path.abspath(path)] = name
+    return names
+
+
+class _ProfiledCall:
+    """
+    Context manager marking the current thread as running a profiled stage.
+    """
+
+    def __init__(self, profiler: 'StageProfiler', label: str):
+        self.profiler = profiler
+        self.label = label
+        self._profile = None
+
+    def __enter__(self):
+        if self.profiler.mode == 'sampling':
+            # the frames below the one entering the context are not sampled
+            self.profiler._enter(threading.get_ident(), self.label, sys._getframe(1))
+        else:
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:  # another profiler is active in this interpreter
+                self._profile = None
+                self.profiler.n_skipped += 1
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler.mode == 'sampling':
+            self.profiler._exit(threading.get_ident())
+        elif self._profile is not None:
+            self._profile.disable()
+            self.profiler._merge(self._profile)
+
+
+class StageProfiler:
+    """
+    Profiles the PipelineElements of a ClaimGeneratorPipeline, optionally
+    restricted to some stages. Two modes are available:
+        sampling  a background thread records every interval seconds the
+                  Python stack of the threads running a profiled element.
+                  The overhead does not depend on the number of calls, so
+                  it can stay enabled on long runs. Produces collapsed
+                  stacks, readable by flamegraph.pl or speedscope. Time
+                  spent in native code is attributed to its Python caller.
+        cprofile  every profiled call runs under cProfile, exact call
+                  counts but a much larger overhead. Produces a pstats file.
+    Both write a per-function summary where functions are keyed by module,
+    e.g. src.evidence.feverous_retriever.utils:check_header_left.
+
+    Only the elements running in the pipeline process are profiled: stages
+    on a process executor are not.
+    """
+
+    def __init__(self,
+                 mode: str = 'sampling',
+                 interval: float = 0.005,
+                 stages: Optional[Iterable[int]] = None):
+        """
+        :param mode: 'sampling' or 'cprofile'
+        :param interval: seconds between two samples in sampling mode
+        :param stages: indices of the pipeline stages to profile, None profiles all
+        """
+        if mode not in ['sampling', 'cprofile']:
+            raise ValueError(f"Expected mode in ['sampling', 'cprofile'] but got {mode}")
+        if interval <= 0:
+            raise ValueError(f"Expected interval > 0 but got {interval}")
+        self.mode = mode
+        self.interval = interval
+        self.stages = None if stages is None else set(stages)
+        self._lock = threading.Lock()
+        self._active = {}  # thread id -> (stage label, frame entering the stage)
+        self._stacks = Counter()  # collapsed stack -> number of samples
+        self._stats = None  # pstats.Stats merging the cprofile calls
+        self._thread = None
+        self._stop = threading.Event()
+        self.n_samples = 0
+        self.n_skipped = 0
+        self._ticks = 0
+        self._sampled_seconds = 0.0
+
+    @property
+    def sample_period(self) -> float:
+        """
+        :return: measured seconds between two samples, larger than interval
+                 when the sampling thread waits for the GIL
+        """
+        if self._ticks == 0:
+            return self.interval
+        return self._sampled_seconds / self._ticks
+
+    def profile(self, stage: int, element) -> object:
+        """
+        :param stage: index of the stage in the pipeline
+        :param element: PipelineElement about to run
+        :return: context manager to run the element in, doing nothing if
+                 the stage is not profiled
+        """
+        if self.stages is not None and stage not in self.stages:
+            return nullcontext()
+        return _ProfiledCall(self, f'stage{stage}:{type(element).__name__}')
+
+    def start(self):
+        """
+        Starts the sampling thread, nothing to do in cprofile mode.
+        """
+        if self.mode != 'sampling' or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _enter(self, thread_id, label, frame):
+        with self._lock:
+            self._active[thread_id] = (label, frame)
+
+    def _exit(self, thread_id):
+        with self._lock:
+            self._active.pop(thread_id, None)
+
+    def _merge(self, profile: cProfile.Profile):
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+
+    def _sample(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            with self._lock:
+                active = dict(self._active)
+            if len(active) == 0:
+                continue
+            frames = sys._current_frames()
+            stacks = []
+            for thread_id, (label, root) in active.items():
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and frame is not root:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(label)
+                stacks.append(';'.join(reversed(stack)))
+            with self._lock:
+                self._stacks.update(stacks)
+                self.n_samples += len(stacks)
+                self._ticks += 1
+                self._sampled_seconds += elapsed
+
+    def collapsed(self) -> Dict[str, int]:
+        """
+        :return: dictionary 'stage;caller;...;callee' -> number of samples,
+                 empty in cprofile mode
+        """
+        with self._lock:
+            return dict(self._stacks)
+
+    def summary(self, top: Optional[int] = None) -> List[Dict]:
+        """
+        :param top: number of functions returned, None returns all of them
+        :return: per-function dictionaries with the keys function ('module:name'),
+                 self_seconds, total_seconds and calls (None in sampling mode),
+                 sorted by self_seconds
+        """
+        rows = []
+        if self.mode == 'sampling':
+            self_samples, total_samples = Counter(), Counter()
+            for stack, n in self.collapsed().items():
+                # the first frame is the stage label
+                functions = stack.split(';')[1:]
+                if len(functions) == 0:
+                    continue
+                self_samples[functions[-1]] += n
+                for function in set(functions):
+                    total_samples[function] += n
+            period = self.sample_period
+            for function, n in total_samples.items():
+                rows.append({'function': function,
+                             'self_seconds': self_samples[function] * period,
+                             'total_seconds': n * period,
+                             'calls': None})
+        elif self._stats is not None:
+            modules = _module_names()
+            for (path, _, name), (_, calls, tt, ct, _) in self._stats.stats.items():
+                module = modules.get(os.path.abspath(path), path)
+                rows.append({'function': f'{module}:{name}',
+                             'self_seconds': tt,
+                             'total_seconds': ct,
+                             'calls': calls})
+        rows.sort(key=lambda r: r['self_seconds'], reverse=True)
+        return rows if top is None else rows[:top]
+
+    def format_summary(self, top: int = 30) -> str:
+        lines = [f'{"self s":>9} {"total s":>9} {"calls":>9}  function']
+        for row in self.summary(top):
+            calls = '' if row['calls'] is None else row['calls']
+            lines.append(f'{row["self_seconds"]:>9.3f} {row["total_seconds"]:>9.3f} '
+                         f'{calls:>9}  {row["function"]}')
+        return '\n'.join(lines)
+
+    def write(self, directory: str) -> List[str]:
+        """
+        Writes summary.txt and either profile.collapsed (sampling) or
+        profile.pstats (cprofile) in directory.
+
+        :param directory: output directory, created if missing
+        :return: paths of the written files
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = [os.path.join(directory, 'summary.txt')]
+        with open(paths[0], 'w', encoding='utf-8') as f:
+            f.write(self.format_summary(top=None) + '\n')
+        if self.mode == 'sampling':
+            paths.append(os.path.join(directory, 'profile.collapsed'))
+            with open(paths[-1], 'w', encoding='utf-8') as f:
+                for stack, n in sorted(self.collapsed().items()):
+                    f.write(f'{stack} {n}\n')
+        elif self._stats is not None:
+            paths.append(os.path.join(directory, 'profile.pstats'))
+            self._stats.dump_stats(paths[-1])
+        if self.n_skipped > 0:
+            logger.warning(f'{self.n_skipped} calls not profiled, '
+                           f'another profiler was active')
+        return paths
+
+    def reset(self):
+        with self._lock:
+            self._stacks = Counter()
+            self._stats = None
+            self.n_samples = 0
+            self.n_skipped = 0
+            self._ticks = 0
+            self._sampled_seconds = 0.0
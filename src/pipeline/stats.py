@@ -0,0 +1,220 @@
+import json
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def _peak_rss() -> int:
+    """
+    :return: peak resident set size of the process in bytes, 0 if unknown
+    """
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def count_items(items: Any) -> int:
+    """
+    :return: number of items, 0 if items has no length (e.g. None)
+    """
+    try:
+        return len(items)
+    except TypeError:
+        return 0
+
+
+class CallStats:
+    """
+    Measures of one PipelineElement call. Instances are returned by the
+    process executor workers, so they only hold plain numbers.
+    """
+
+    def __init__(self,
+                 wall: float = 0.0,
+                 cpu: float = 0.0,
+                 items_in: int = 0,
+                 items_out: int = 0,
+                 rss_delta: int = 0):
+        """
+        :param wall: elapsed seconds
+        :param cpu: CPU seconds of the thread running the element
+        :param items_in: number of input items
+        :param items_out: number of output items
+        :param rss_delta: growth of the peak RSS of the process in bytes
+        """
+        self.wall = wall
+        self.cpu = cpu
+        self.items_in = items_in
+        self.items_out = items_out
+        self.rss_delta = rss_delta
+
+
+class Measure:
+    """
+    Context manager measuring wall time, thread CPU time and peak RSS growth.
+    The item counts are set by the caller.
+    """
+
+    def __enter__(self):
+        self.stats = CallStats()
+        self._rss = _peak_rss()
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, *exc):
+        self.stats.wall = time.perf_counter() - self._wall
+        self.stats.cpu = time.thread_time() - self._cpu
+        self.stats.rss_delta = _peak_rss() - self._rss
+
+
+def measure_call(element, element_input: Any):
+    """
+    Calls element on element_input and measures the call.
+
+    :return: the output of the element and its CallStats
+    """
+    with Measure() as stats:
+        output = element(element_input)
+    stats.items_in = count_items(element_input)
+    stats.items_out = count_items(output)
+    return output, stats
+
+
+class ElementStats:
+    """
+    Statistics accumulated over the calls of one PipelineElement.
+    """
+
+    def __init__(self, stage: int, branch: int, element: str):
+        self.stage = stage
+        self.branch = branch
+        self.element = element
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.items_in = 0
+        self.items_out = 0
+        self.peak_rss_delta = 0
+
+    def add(self, call: CallStats):
+        self.calls += 1
+        self.wall += call.wall
+        self.cpu += call.cpu
+        self.items_in += call.items_in
+        self.items_out += call.items_out
+        self.peak_rss_delta = max(self.peak_rss_delta, call.rss_delta)
+
+    @property
+    def items_per_second(self):
+        return self.items_out / self.wall if self.wall > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'stage': self.stage,
+            'branch': self.branch,
+            'element': self.element,
+            'calls': self.calls,
+            'wall_seconds': self.wall,
+            'cpu_seconds': self.cpu,
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'items_per_second': self.items_per_second,
+            'peak_rss_delta_bytes': self.peak_rss_delta,
+        }
+
+    def __str__(self):
+        return f'stage {self.stage} {self.element}[{self.branch}]: ' \
+               f'{self.calls} calls, {self.wall:.2f}s wall, {self.cpu:.2f}s cpu, ' \
+               f'{self.items_in} in / {self.items_out} out, ' \
+               f'{self.items_per_second:.1f} items/s, ' \
+               f'peak RSS +{self.peak_rss_delta / 2 ** 20:.1f} MiB'
+
+
+# name, attribute of ElementStats, help of the Prometheus metrics
+_METRICS = [
+    ('tenet_element_calls_total', 'calls', 'Number of calls of the element'),
+    ('tenet_element_wall_seconds_total', 'wall', 'Wall time spent in the element'),
+    ('tenet_element_cpu_seconds_total', 'cpu', 'CPU time of the threads running the element'),
+    ('tenet_element_items_in_total', 'items_in', 'Items received by the element'),
+    ('tenet_element_items_out_total', 'items_out', 'Items produced by the element'),
+    ('tenet_element_items_per_second', 'items_per_second', 'Output items per second of wall time'),
+    ('tenet_element_peak_rss_delta_bytes', 'peak_rss_delta',
+     'Largest growth of the process peak RSS during one call'),
+]
+
+
+class PipelineStats:
+    """
+    Per-element statistics of a ClaimGeneratorPipeline, accumulated over all
+    its runs. Elements are identified by their stage and their position
+    in the stage (branch).
+    The CPU time is the one of the thread running the element, work done in
+    other threads or processes it starts (e.g. the workers of a
+    ParallelClaimGenerator) is not included. The peak RSS is the one of the
+    process running the element, so it only grows after the first calls.
+    In streaming mode an element is measured as a single call and its wall
+    time includes the time spent waiting for upstream items.
+    """
+
+    def __init__(self):
+        self.elements = {}  # (stage, branch) -> ElementStats
+        self._lock = threading.Lock()
+
+    def record(self, stage: int, branch: int, element, call: CallStats):
+        with self._lock:
+            key = (stage, branch)
+            if key not in self.elements:
+                self.elements[key] = ElementStats(stage, branch, type(element).__name__)
+            self.elements[key].add(call)
+
+    def to_list(self) -> List[Dict]:
+        return [self.elements[k].to_dict() for k in sorted(self.elements)]
+
+    def to_json(self) -> str:
+        return json.dumps({'elements': self.to_list()}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        :return: the statistics in the Prometheus text exposition format
+        """
+        lines = []
+        for name, attribute, help_text in _METRICS:
+            kind = 'counter' if name.endswith('_total') else 'gauge'
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for key in sorted(self.elements):
+                e = self.elements[key]
+                labels = f'stage="{e.stage}",branch="{e.branch}",element="{e.element}"'
+                lines.append(f'{name}{{{labels}}} {getattr(e, attribute)}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str, file_format: str = 'json'):
+        """
+        :param path: output file
+        :param file_format: 'json' or 'prometheus'
+        """
+        if file_format == 'json':
+            text = self.to_json()
+        elif file_format == 'prometheus':
+            text = self.to_prometheus()
+        else:
+            raise ValueError(f"Expected file_format in ['json', 'prometheus'] "
+                             f"but got {file_format}")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def reset(self):
+        with self._lock:
+            self.elements = {}
+
+    def __str__(self):
+        return '\n'.join(str(self.elements[k]) for k in sorted(self.elements))
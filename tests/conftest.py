@@ -0,0 +1,39 @@
+import logging
+import os
+
+import pytest
+
+from benchmarks.synthetic_db import write_synthetic_db
+from src.evidence.feverous_retriever.random import FeverousRetrieverRandom
+from src.logger import logger
+
+# TableException logs every rejected table
+logger.setLevel(logging.CRITICAL)
+
+
+@pytest.fixture(scope='session')
+def synthetic_db(tmp_path_factory):
+    """
+    Path of a small synthetic FEVEROUS database, see benchmarks/synthetic_db.py
+    """
+    directory = tmp_path_factory.mktemp('feverous')
+    return write_synthetic_db(os.path.join(directory, 'feverous.db'), 300, seed=0)
+
+
+@pytest.fixture
+def make_retriever(synthetic_db):
+    """
+    Factory of seeded random retrievers on the synthetic database, each call
+    of the retriever returns a few evidences.
+    """
+    def make(seed=0, num_evidence=10, **kwargs):
+        return FeverousRetrieverRandom(p_dataset=synthetic_db,
+                                       num_positive=num_evidence,
+                                       num_negative=num_evidence,
+                                       table_type='both',
+                                       wrong_cell=1,
+                                       column_per_table=2,
+                                       seed=seed,
+                                       key_strategy='random',
+                                       **kwargs)
+    return make
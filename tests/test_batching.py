@@ -0,0 +1,77 @@
+"""
+DynamicBatcher merges concurrent requests into shared batches and refuses
+new ones once closed, also behind a ClaimGenerationServer.
+"""
+import threading
+
+import pytest
+
+from benchmarks.retriever_benchmark import StubClaimGenerator
+from src.claim import RemoteClaimGenerator
+from src.claim.batching import DynamicBatcher
+from src.claim.server import ClaimGenerationServer
+
+
+class RecordingModel:
+    """
+    Upper-cases the texts and records the batches it receives.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return [t.upper() for t in texts]
+
+
+def test_concurrent_requests_share_a_batch():
+    model = RecordingModel()
+    batcher = DynamicBatcher(model, max_batch_size=4, max_wait=10.0)
+
+    futures = [batcher.submit(['a', 'b']), batcher.submit([]), batcher.submit(['c', 'd'])]
+
+    assert [f.result(timeout=5) for f in futures] == [['A', 'B'], [], ['C', 'D']]
+    assert model.batches == [['a', 'b', 'c', 'd']]
+    batcher.close()
+
+
+def test_close_serves_the_pending_requests_then_refuses_new_ones():
+    model = RecordingModel()
+    batcher = DynamicBatcher(model, max_batch_size=100, max_wait=10.0)
+    future = batcher.submit(['a'])
+
+    batcher.close()
+    batcher.close()
+
+    assert future.result(timeout=0) == ['A']
+    with pytest.raises(RuntimeError):
+        batcher.submit(['b'])
+
+
+@pytest.fixture
+def server():
+    server = ClaimGenerationServer({'stub': StubClaimGenerator()}, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.httpd.shutdown()
+    thread.join()
+
+
+def client(server, encoding='compact'):
+    host, port = server.httpd.server_address[:2]
+    return RemoteClaimGenerator(encoding, url=f'http://{host}:{port}', model='stub', timeout=10)
+
+
+def test_server_generates_the_claims(server):
+    assert client(server).generate_texts(['a', 'b']) == ['a', 'b']
+    with pytest.raises(ValueError):
+        client(server, encoding='totto').generate_texts(['a'])
+
+
+def test_server_reports_a_closed_batcher(server):
+    server.batchers['stub'].close()
+
+    with pytest.raises(RuntimeError, match='closed DynamicBatcher'):
+        client(server).generate_texts(['a'])
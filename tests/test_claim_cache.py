@@ -0,0 +1,92 @@
+"""
+Claims are read from the ClaimCache only for the same model, encoding,
+decoding parameters and text, the least recently used ones are evicted.
+"""
+import logging
+import time
+
+import pytest
+
+from src.claim import ClaimCache, DecodingProfile, TextualClaimGenerator
+
+
+class EchoGenerator(TextualClaimGenerator):
+    """
+    Returns the encoded evidence as claim, prefixed by its model name, and
+    counts the texts sent to the model.
+    """
+
+    def __init__(self, model='echo', **kwargs):
+        super().__init__('compact', **kwargs)
+        self.model = model
+        self.texts = []
+
+    def _model_fingerprint(self):
+        return self.model
+
+    def _generate_claim(self, text):
+        self.texts.append(text)
+        return f'{self.model}: {text}'
+
+
+class UnknownModelGenerator(EchoGenerator):
+
+    def _model_fingerprint(self):
+        return TextualClaimGenerator._model_fingerprint(self)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ClaimCache(str(tmp_path / 'claims.sqlite'))
+    yield cache
+    cache.close()
+
+
+def test_claims_are_reused_for_the_same_model(cache):
+    EchoGenerator(cache=cache).generate_texts(['a', 'b'])
+
+    generator = EchoGenerator(cache=cache)
+    assert generator.generate_texts(['b', 'c', 'b']) == ['echo: b', 'echo: c', 'echo: b']
+    assert generator.texts == ['c']
+
+
+@pytest.mark.parametrize('other', [
+    {'model': 'other'},
+    {'decoding_profile': DecodingProfile(max_new_tokens=8)},
+])
+def test_claims_are_not_shared_across_configurations(cache, other):
+    EchoGenerator(cache=cache).generate_texts(['a'])
+
+    generator = EchoGenerator(cache=cache, **other)
+    generator.generate_texts(['a'])
+
+    assert generator.texts == ['a']
+    assert len(cache) == 2
+
+
+def test_least_recently_used_claims_are_evicted(tmp_path):
+    cache = ClaimCache(str(tmp_path / 'claims.sqlite'), max_entries=2)
+    keys = [cache.make_key('echo', 'compact', {}, t) for t in 'abc']
+    for key in keys[:2]:
+        cache.put_many([(key, 'claim')])
+        time.sleep(0.01)
+    cache.get_many([keys[0]])
+    time.sleep(0.01)
+
+    cache.put_many([(keys[2], 'claim')])
+
+    assert set(cache.get_many(keys)) == {keys[0], keys[2]}
+    cache.close()
+
+
+def test_unknown_model_disables_the_cache(cache, caplog):
+    caplog.set_level(logging.WARNING, logger='src.logger')
+    generator = UnknownModelGenerator(cache=cache)
+
+    generator.generate_texts(['a'])
+    generator.generate_texts(['a'])
+
+    assert generator.texts == ['a', 'a']
+    assert generator.cache is None
+    assert len(cache) == 0
+    assert sum('claim cache is disabled' in r.message for r in caplog.records) == 1
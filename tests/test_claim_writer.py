@@ -0,0 +1,42 @@
+"""
+JsonlClaimWriter writes one claim per line, in the TextualClaim.to_json
+format, with ids increasing across calls.
+"""
+import gzip
+import json
+
+import pytest
+
+from benchmarks.retriever_benchmark import StubClaimGenerator
+from src.claim import JsonlClaimWriter, TextualClaim
+from src.pipeline import Batch
+
+
+def read_lines(path, compression):
+    if compression == 'gzip':
+        f = gzip.open(path, 'rt', encoding='utf-8')
+    elif compression == 'zstd':
+        import zstandard
+        f = zstandard.open(path, 'rt', encoding='utf-8')
+    else:
+        f = open(path, encoding='utf-8')
+    with f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'zstd'])
+def test_claims_round_trip(make_retriever, tmp_path, compression):
+    if compression == 'zstd':
+        pytest.importorskip('zstandard')
+    claims = StubClaimGenerator().generate(make_retriever()())
+    half = len(claims) // 2
+    path = str(tmp_path / 'claims.jsonl')
+
+    with JsonlClaimWriter(path, compression=compression, flush_every=3) as writer:
+        assert writer(claims[:half]) == claims[:half]
+        assert list(writer.stream(iter([Batch(claims[half:-1]), claims[-1]]))) == claims[half:]
+    writer.close()
+
+    expected = [json.loads(json.dumps(TextualClaim._claim_to_json(i, c), ensure_ascii=False))
+                for i, c in enumerate(claims)]
+    assert read_lines(path, compression) == expected
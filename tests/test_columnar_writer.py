@@ -0,0 +1,31 @@
+"""
+ColumnarClaimWriter writes one row per claim and can be closed twice.
+"""
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+
+from src.claim import ColumnarClaimWriter  # noqa: E402
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_rows_round_trip_and_close_twice(make_retriever, tmp_path, file_format):
+    evidences = make_retriever()()
+    path = str(tmp_path / f'claims.{file_format}')
+
+    writer = ColumnarClaimWriter(path, file_format=file_format, row_group_size=3)
+    assert writer(evidences) == evidences
+    writer.close()
+    writer.close()
+    with pytest.raises(ValueError):
+        writer(evidences)
+
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    else:
+        table = pa.ipc.open_file(path).read_all()
+    assert table.column('id').to_pylist() == list(range(len(evidences)))
+    assert table.column('label').to_pylist() == [e.label for e in evidences]
+    assert [len(p) for p in table.column('pieces').to_pylist()] == \
+        [len(e.evidence_pieces) for e in evidences]
@@ -0,0 +1,27 @@
+"""
+The default DecodingProfile keeps the settings of the underlying model, like
+the 'default' profile of the pipeline config.
+"""
+import os
+
+import yaml
+
+from src.claim import DecodingProfile
+
+CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      'src', 'config', 'config_pipeline.yaml')
+
+
+def test_default_profile_keeps_the_model_settings():
+    assert DecodingProfile().to_dict() == {'num_beams': 1,
+                                           'max_new_tokens': None,
+                                           'max_input_tokens': None,
+                                           'early_stopping': False}
+
+
+def test_default_profile_matches_the_config():
+    with open(CONFIG, encoding='utf-8') as f:
+        profiles = yaml.safe_load(f)['decoding_profiles']
+
+    assert DecodingProfile.from_dict('default', profiles['default']).to_dict() == \
+        DecodingProfile().to_dict()
@@ -0,0 +1,66 @@
+"""
+EvidenceDeduplicator removes the evidences whose canonical key was already
+seen, whatever the order of their pieces.
+"""
+import pytest
+
+from src.evidence import EvidenceDeduplicator
+from src.evidence.deduplication import canonical_key
+from src.pipeline import Batch
+
+
+def reversed_copy(evidence):
+    copy = evidence.__class__.__new__(evidence.__class__)
+    copy.__dict__.update(evidence.__dict__)
+    copy.evidence_pieces = list(reversed(evidence.evidence_pieces))
+    return copy
+
+
+@pytest.fixture
+def evidences(make_retriever):
+    evidences = make_retriever(seed=0)()
+    assert len({canonical_key(e) for e in evidences}) == len(evidences)
+    return evidences
+
+
+def test_key_ignores_the_order_of_the_pieces(evidences):
+    multi = [e for e in evidences if len(e.evidence_pieces) > 1]
+    assert len(multi) > 0
+    for evidence in multi:
+        assert canonical_key(reversed_copy(evidence)) == canonical_key(evidence)
+
+
+def test_duplicates_are_dropped_across_calls(evidences):
+    deduplicator = EvidenceDeduplicator(encoding='compact')
+    half = len(evidences) // 2
+
+    assert deduplicator(evidences[:half]) == evidences[:half]
+    unique = deduplicator([reversed_copy(e) for e in evidences[:half]] + evidences[half:])
+
+    assert unique == evidences[half:]
+    assert deduplicator.n_seen == len(evidences) + half
+    assert deduplicator.n_duplicates == half
+    assert deduplicator.saved_tokens > 0
+
+
+def test_stream_filters_batches_and_single_evidences(evidences):
+    deduplicator = EvidenceDeduplicator()
+    items = [Batch(evidences), evidences[0], Batch(evidences[:2]), evidences[-1]]
+
+    out = list(deduplicator.stream(iter(items)))
+
+    # the fully duplicated batch and the duplicated evidences are not yielded
+    assert out == [Batch(evidences)]
+    assert isinstance(out[0], Batch)
+    assert deduplicator.n_duplicates == 4
+
+
+def test_reset_forgets_the_keys_and_the_counters(evidences):
+    deduplicator = EvidenceDeduplicator(encoding='compact')
+    deduplicator(evidences)
+    deduplicator(evidences)
+
+    deduplicator.reset()
+
+    assert (deduplicator.n_seen, deduplicator.n_duplicates, deduplicator.saved_tokens) == (0, 0, 0)
+    assert deduplicator(evidences) == evidences
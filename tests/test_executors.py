@@ -0,0 +1,34 @@
+"""
+Running the elements on a thread or process executor gives the same claims,
+call after call, as running them sequentially: the state of the elements
+run by a process executor is sent back to the pipeline process.
+"""
+import asyncio
+
+import pytest
+
+from benchmarks.retriever_benchmark import StubClaimGenerator
+from src.pipeline import ClaimGeneratorPipeline
+
+N_CALLS = 3
+
+
+def run(make_retriever, executor):
+    retrievers = [make_retriever(seed=0), make_retriever(seed=1)]
+    pipeline = ClaimGeneratorPipeline([retrievers, StubClaimGenerator()], executor=executor)
+    try:
+        outputs = [pipeline.generate() for _ in range(N_CALLS)]
+        outputs.append(asyncio.run(pipeline.agenerate()))
+    finally:
+        pipeline.close()
+    claims = [[str(c) for c in output] for output in outputs]
+    rejections = [(r.rejections.n_pages, r.rejections.rejected_pages) for r in retrievers]
+    return claims, rejections
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_executor_matches_sequential_run(make_retriever, executor):
+    claims, rejections = run(make_retriever, None)
+    assert claims[0] != claims[1]  # the retrievers move on at every call
+
+    assert run(make_retriever, executor) == (claims, rejections)
@@ -0,0 +1,31 @@
+"""
+Importing the packages must not load the heavy backends: torch, transformers
+and TensorFlow are imported when a generator is built, spaCy when the
+'entity' key strategy first needs its model.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['torch', 'tensorflow', 'transformers', 'spacy']
+IMPORT_BUDGET_SECONDS = 3.0  # torch or TensorFlow alone take longer than this
+
+SCRIPT = ("import json, sys\n"
+          "import src.evidence, src.claim, src.pipeline\n"
+          f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n")
+
+
+def test_import_budget():
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', SCRIPT], cwd=REPO_ROOT,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+
+    assert result.returncode == 0, result.stderr
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    assert loaded == [], f'heavy modules loaded at import time: {loaded}'
+    assert elapsed < IMPORT_BUDGET_SECONDS, \
+        f'importing the packages took {elapsed:.2f}s, budget {IMPORT_BUDGET_SECONDS}s'
@@ -0,0 +1,60 @@
+"""
+MicroBatchElement emits a batch when it is full or when max_wait seconds
+have passed since its first item, even while upstream is busy.
+"""
+import threading
+
+import pytest
+
+from src.pipeline import Batch, MicroBatchElement
+
+
+def test_full_batches_and_the_rest():
+    element = MicroBatchElement(max_batch_size=4, max_wait=None)
+
+    batches = list(element.stream(iter(range(10))))
+
+    assert batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert all(isinstance(b, Batch) for b in batches)
+    assert (element.n_batches, element.n_items) == (3, 10)
+
+
+def test_deadline_flushes_while_upstream_is_busy():
+    released = threading.Event()
+
+    def upstream():
+        yield from [0, 1]
+        assert released.wait(timeout=10)
+        yield 2
+
+    batches = MicroBatchElement(max_batch_size=4, max_wait=0.05).stream(upstream())
+
+    # the first batch is emitted before upstream produces its next item
+    assert next(batches) == [0, 1]
+    released.set()
+    assert list(batches) == [[2]]
+
+
+def test_upstream_failure_is_raised():
+    def upstream():
+        yield 0
+        raise KeyError('failed')
+
+    with pytest.raises(KeyError):
+        list(MicroBatchElement(max_batch_size=4, max_wait=None).stream(upstream()))
+
+
+def test_batches_are_sorted_by_length(make_retriever):
+    evidences = make_retriever()()
+    element = MicroBatchElement(max_batch_size=len(evidences), sort_by_length=True,
+                                encoding='compact')
+    expected = sorted(evidences, key=lambda e: len(e.to_text('compact')))
+
+    assert list(element.stream(iter(evidences))) == [expected]
+    assert element(evidences) == expected
+
+
+@pytest.mark.parametrize('kwargs', [{'max_batch_size': 0}, {'sort_by_length': True}])
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        MicroBatchElement(**kwargs)
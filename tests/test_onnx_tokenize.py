@@ -0,0 +1,39 @@
+"""
+OnnxT5Generator truncates its inputs like T5Tokenizer: to max_input_tokens,
+or to the t5-small limit when the decoding profile has none.
+"""
+from src.claim import DecodingProfile, OnnxT5Generator
+
+
+class WhitespaceTokenizer:
+    """
+    Stands in for the sentencepiece model, one id per word.
+    """
+
+    def EncodeAsIds(self, text):
+        return [2 + i for i, _ in enumerate(text.split())]
+
+
+def tokenize(texts, max_input_tokens):
+    # onnxruntime and sentencepiece are only needed to load the model
+    generator = OnnxT5Generator.__new__(OnnxT5Generator)
+    generator.decoding_profile = DecodingProfile(max_input_tokens=max_input_tokens)
+    generator.tokenizer = WhitespaceTokenizer()
+    return generator._tokenize(texts)
+
+
+def test_profile_limit_truncates_the_inputs():
+    input_ids, attention_mask = tokenize(['a ' * 10, 'a b'], max_input_tokens=4)
+
+    assert input_ids.shape == (2, 4)
+    assert input_ids[0, -1] == OnnxT5Generator.eos_token_id
+    assert attention_mask.sum(axis=1).tolist() == [4, 3]
+
+
+def test_model_limit_applies_without_profile_limit():
+    long_text = 'a ' * (2 * OnnxT5Generator.model_max_length)
+
+    input_ids, _ = tokenize([long_text], max_input_tokens=None)
+
+    assert input_ids.shape == (1, OnnxT5Generator.model_max_length)
+    assert input_ids[0, -1] == OnnxT5Generator.eos_token_id
@@ -0,0 +1,53 @@
+import logging
+
+from src.evidence import canonical_key
+from src.pipeline import ClaimGeneratorPipeline
+from src.pipeline import StageMemo
+
+N_CALLS = 3
+
+
+def keys(evidences):
+    return [canonical_key(e) for e in evidences]
+
+
+def run(retriever, n_calls, memo=None):
+    pipeline = ClaimGeneratorPipeline([retriever], memo=memo)
+    return [keys(pipeline.generate()) for _ in range(n_calls)]
+
+
+def test_memoized_calls_match_unmemoized(make_retriever, tmp_path):
+    reference_retriever = make_retriever()
+    reference = run(reference_retriever, N_CALLS)
+    assert reference[0] != reference[1]  # the seeded retriever moves on at every call
+
+    # a shorter run stores the first call only
+    assert run(make_retriever(), 1, StageMemo(tmp_path)) == reference[:1]
+
+    # the first call is reused, the following ones continue from its state
+    memo = StageMemo(tmp_path)
+    retriever = make_retriever()
+    assert run(retriever, N_CALLS, memo) == reference
+    assert (memo.hits, memo.misses) == (1, N_CALLS - 1)
+    assert retriever.rejections.to_dict()['pages'] == \
+        reference_retriever.rejections.to_dict()['pages']
+
+    # everything is reused now
+    memo = StageMemo(tmp_path)
+    assert run(make_retriever(), N_CALLS, memo) == reference
+    assert (memo.hits, memo.misses) == (N_CALLS, 0)
+
+
+def test_other_configuration_is_not_reused(make_retriever, tmp_path):
+    run(make_retriever(seed=0), 1, StageMemo(tmp_path))
+    memo = StageMemo(tmp_path)
+    assert run(make_retriever(seed=1), 1, memo) == run(make_retriever(seed=1), 1)
+    assert memo.hits == 0
+
+
+def test_stream_warns_that_the_memo_is_unused(make_retriever, tmp_path, caplog):
+    caplog.set_level(logging.WARNING, logger='src.logger')
+    pipeline = ClaimGeneratorPipeline([make_retriever()], memo=StageMemo(tmp_path))
+    # streamed page by page instead of SUPPORTS first
+    assert sorted(keys(pipeline.stream())) == sorted(run(make_retriever(), 1)[0])
+    assert 'not used by stream' in caplog.text
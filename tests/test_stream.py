@@ -0,0 +1,77 @@
+"""
+stream and astream give the same claims as generate, and a failure is
+reported as a PipelineError naming the element that raised it.
+"""
+import asyncio
+
+import pytest
+
+from benchmarks.retriever_benchmark import StubClaimGenerator
+from src.pipeline import ClaimGeneratorPipeline, MicroBatchElement, PipelineElement, PipelineError
+
+
+class Numbers(PipelineElement):
+
+    def __call__(self, *args, **kwargs):
+        return list(range(10))
+
+
+class Identity(PipelineElement):
+
+    def __call__(self, *args, **kwargs):
+        return list(args[0])
+
+
+class Failing(PipelineElement):
+
+    def __call__(self, *args, **kwargs):
+        raise KeyError('failed')
+
+
+def pipeline(make_retriever):
+    retrievers = [make_retriever(seed=0), make_retriever(seed=1)]
+    return ClaimGeneratorPipeline([retrievers,
+                                   MicroBatchElement(max_batch_size=8, max_wait=None),
+                                   StubClaimGenerator(batch_size=8)])
+
+
+async def collect(claims):
+    return [c async for c in claims]
+
+
+def test_stream_matches_generate(make_retriever):
+    generated = sorted(str(c) for c in pipeline(make_retriever).generate())
+
+    streamed = sorted(str(c) for c in pipeline(make_retriever).stream(queue_size=2))
+    astreamed = asyncio.run(collect(pipeline(make_retriever).astream(queue_size=2)))
+
+    assert len(generated) > 0
+    assert streamed == generated
+    assert sorted(str(c) for c in astreamed) == generated
+
+
+@pytest.mark.parametrize('failing_stage', [0, 1, 2])
+def test_errors_name_the_element_that_raised(failing_stage):
+    elements = [Numbers(), Identity(), Identity()]
+    elements[failing_stage] = failing = Failing()
+
+    with pytest.raises(PipelineError) as error:
+        list(ClaimGeneratorPipeline(elements).stream())
+
+    assert error.value.stage == failing_stage
+    assert error.value.element is failing
+    assert isinstance(error.value.__cause__, KeyError)
+
+
+def test_errors_raised_by_a_nested_pipeline_are_wrapped():
+    class Nested(PipelineElement):
+        def __call__(self, *args, **kwargs):
+            return ClaimGeneratorPipeline([Failing()]).generate(args[0])
+
+    nested = Nested()
+    with pytest.raises(PipelineError) as error:
+        list(ClaimGeneratorPipeline([Numbers(), nested, Identity()]).stream())
+
+    # the PipelineError of the nested pipeline is not mistaken for an upstream failure
+    assert error.value.stage == 1
+    assert error.value.element is nested
@@ -0,0 +1,28 @@
+"""
+In streaming mode the items carried by a Batch are counted one by one, as
+generate counts the items of the lists passed between the elements.
+"""
+from benchmarks.retriever_benchmark import StubClaimGenerator
+from src.pipeline import ClaimGeneratorPipeline, MicroBatchElement
+
+
+def items(pipeline):
+    return [(e['element'], e['items_in'], e['items_out']) for e in pipeline.stats.to_list()]
+
+
+def test_batches_are_counted_by_their_items(make_retriever):
+    n_evidences = len(make_retriever()())
+    elements = [make_retriever(), MicroBatchElement(max_batch_size=4, max_wait=None),
+                StubClaimGenerator(batch_size=4)]
+
+    streamed = ClaimGeneratorPipeline(elements)
+    claims = list(streamed.stream())
+    generated = ClaimGeneratorPipeline([make_retriever(), *elements[1:]])
+    generated.generate()
+
+    assert len(claims) == n_evidences
+    assert items(streamed) == items(generated) == [
+        ('FeverousRetrieverRandom', 0, n_evidences),
+        ('MicroBatchElement', n_evidences, n_evidences),
+        ('StubClaimGenerator', n_evidences, n_evidences),
+    ]